@@ -44,11 +44,13 @@ def clean(paths: typing.Iterable[os.PathLike] = ARTIFACT_PATHS) -> None:
     Clean up after a test run.
 
     """
-    [
-        shutil.rmtree(path) if path.is_dir() else path.unlink()
-        for path in paths
-        if path.exists()
-    ]
+    for path in paths:
+        try:
+            shutil.rmtree(path)
+        except NotADirectoryError:
+            path.unlink()
+        except FileNotFoundError:
+            pass
 
 
 # Tasks which run the package's test suites.
@@ -66,7 +66,7 @@ configuration).
 # SPDX-License-Identifier: BSD-3-Clause
 
 from ._async_client import AsyncClient
-from ._common import USER_AGENT, CheckResponse, Config
+from ._common import USER_AGENT, CheckResponse, Config, clear_verify_cache
 from ._exceptions import (
     AkismetError,
     APIKeyError,
@@ -95,4 +95,5 @@ __all__ = [
     "UnknownArgumentError",
     "USER_AGENT",
     "__version__",
+    "clear_verify_cache",
 ]
@@ -5,8 +5,17 @@ Asynchronous Akismet API client implementation.
 
 # SPDX-License-Identifier: BSD-3-Clause
 
-import textwrap
-from typing import TYPE_CHECKING, Optional, Union
+import asyncio
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Union,
+)
 
 import httpx
 
@@ -68,6 +77,22 @@ class AsyncClient:
        it is strongly recommended that you call :meth:`verify_key` to validate your
        configuration prior to calling any other methods.
 
+    Since all the API methods of this client are coroutines, a single client instance
+    can have many requests to Akismet in flight at once, all sharing its pool of HTTP
+    connections. For example, to check several pieces of content concurrently rather
+    than one after another:
+
+    .. code-block:: python
+
+       import asyncio
+
+       results = await asyncio.gather(
+           *(akismet_client.comment_check(**comment) for comment in comments)
+       )
+
+    The :meth:`comment_check_many` method does this for you, with a cap on the number
+    of requests in flight at any one time.
+
     If you want to modify the HTTP request behavior -- for example, to support a
     required HTTP proxy -- you can construct a custom ``httpx.AsyncClient`` and pass it
     as the keyword argument ``http_client`` to either :meth:`validated_client` or the
@@ -140,6 +165,12 @@ class AsyncClient:
         will be read from the environment variable ``PYTHON_AKISMET_API_KEY``, and the
         registered site URL from the environment variable ``PYTHON_AKISMET_BLOG_URL``.
 
+        A successful verification is remembered by the process for an hour, so
+        constructing further clients with the same configuration during that time will
+        not make another request to Akismet. Call :func:`~akismet.clear_verify_cache` to
+        forget remembered verifications (for example, between tests which use mock HTTP
+        clients).
+
         :param http_client: An optional ``httpx`` async HTTP client instance to
            use. Generally you should only pass this in if you need significantly
            customized HTTP-client behavior, and if you do pass this argument you are
@@ -166,19 +197,54 @@ class AsyncClient:
         # alternative constructor in order to achieve API consistency.
         config = _common._try_discover_config()
         instance = cls(config=config, http_client=http_client)
+        if _common._is_verified(config):
+            return instance
         if not await instance.verify_key(config.key, config.url):
             raise _exceptions.APIKeyError(
-                textwrap.dedent(
-                    f"""
-                    Akismet API key and/or blog URL were invalid.
-
-                    Found API key: {config.key}
-                    Found blog URL: {config.url}
-                    """
-                )
+                _common._INVALID_CONFIG_MESSAGE.format(key=config.key, url=config.url)
             )
+        _common._mark_verified(config)
         return instance
 
+    # Resource management.
+    # ----------------------------------------------------------------------------
+
+    async def close(self) -> None:
+        """
+        Close this client's underlying HTTP client, releasing its pooled
+        connections.
+
+        The client cannot be used to make further requests after this. You can also
+        use the client as an async context manager, in which case it will be closed
+        automatically at the end of the ``async with`` block:
+
+        .. code-block:: python
+
+           import akismet
+
+           async with await akismet.AsyncClient.validated_client() as akismet_client:
+               await akismet_client.comment_check(...)
+
+        If you passed in a custom HTTP client which is shared with other code, do not
+        call this method; close the HTTP client yourself once nothing is using it.
+
+        """
+        await self._http_client.aclose()
+
+    async def __aenter__(self) -> "AsyncClient":
+        """
+        Enter an ``async with`` block, returning this client.
+
+        """
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        """
+        Exit an ``async with`` block, closing this client.
+
+        """
+        await self.close()
+
     # Internal/helper methods.
     # ----------------------------------------------------------------------------
 
@@ -209,11 +275,10 @@ class AsyncClient:
             raise _exceptions.AkismetError(
                 f"Unrecognized request method attempted: {method}."
             )
-        handler = getattr(self._http_client, method.lower())
         request_kwarg = "data" if method == "POST" else "params"
         try:
-            response = await handler(
-                f"{_common._API_URL}/{version}/{endpoint}", **{request_kwarg: data}
+            response = await self._http_client.request(
+                method, _common._API_URLS[(version, endpoint)], **{request_kwarg: data}
             )
             response.raise_for_status()
         except httpx.HTTPStatusError as exc:
@@ -224,12 +289,11 @@ class AsyncClient:
             raise _exceptions.RequestError("Akismet timed out.") from exc
         except httpx.RequestError as exc:
             raise _exceptions.RequestError("Error making request to Akismet.") from exc
-        except Exception as exc:
-            raise _exceptions.RequestError("Error making request to Akismet.") from exc
         # Since it's possible to construct a client without performing up-front API key
         # validation, we have to watch out here for the possibility that we're making
         # requests with an invalid key, and raise the appropriate exception.
-        if endpoint != _common._VERIFY_KEY and response.text == "invalid":
+        if endpoint != _common._VERIFY_KEY and response.content == b"invalid":
+            _common._forget_verified(self._config)
             raise _exceptions.APIKeyError(
                 "Akismet API key and/or site URL are invalid."
             )
@@ -278,11 +342,11 @@ class AsyncClient:
            optional argument names.
 
         """
-        unknown_args = [k for k in kwargs if k not in _common._OPTIONAL_KEYS]
+        unknown_args = kwargs.keys() - _common._OPTIONAL_KEYS
         if unknown_args:
             raise _exceptions.UnknownArgumentError(
-                f"Received unknown argument(s) for Akismet operation {endpoint}"
-                f"{', '.join(unknown_args)}"
+                f"Received unknown argument(s) for Akismet operation {endpoint}: "
+                f"{', '.join(sorted(unknown_args))}"
             )
         data = {
             "api_key": self._config.key,
@@ -308,10 +372,53 @@ class AsyncClient:
         response = await self._post_request(
             _common._API_V11, endpoint, user_ip=user_ip, **kwargs
         )
-        if response.text == _common._SUBMISSION_RESPONSE:
+        if response.content == _common._SUBMISSION_RESPONSE:
             return True
         _common._protocol_error(endpoint, response)
 
+    async def _call_many(
+        self,
+        method: Callable[..., Awaitable[Any]],
+        items: Iterable[dict],
+        max_concurrency: int,
+    ) -> list:
+        """
+        Call one of this client's API methods once for each item, concurrently, and
+        return the results in the same order as the items.
+
+        :param method: The API method to call.
+
+        :param items: The keyword arguments for each call.
+
+        :param max_concurrency: The maximum number of calls to have in flight at once.
+
+        :raises ValueError: When ``max_concurrency`` is less than 1.
+
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be greater than 0")
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _call(item: dict) -> Any:
+            """
+            Make a single call, waiting for a free slot first.
+
+            """
+            async with semaphore:
+                return await method(**item)
+
+        tasks = [asyncio.ensure_future(_call(item)) for item in items]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            # If any call fails, don't leave the rest running (and holding connections
+            # from the pool) in the background; cancel them and wait for them to
+            # finish before propagating the error.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
     # Public methods corresponding to the methods of the Akismet API.
     # ----------------------------------------------------------------------------
 
@@ -363,13 +470,15 @@ class AsyncClient:
         response = await self._post_request(
             _common._API_V11, _common._COMMENT_CHECK, user_ip=user_ip, **kwargs
         )
-        if response.text == "true":
-            if response.headers.get("X-akismet-pro-tip", "") == "discard":
-                return _common.CheckResponse.DISCARD
-            return _common.CheckResponse.SPAM
-        if response.text == "false":
-            return _common.CheckResponse.HAM
-        _common._protocol_error(_common._COMMENT_CHECK, response)
+        result = _common._CHECK_RESPONSES.get(response.content)
+        if result is None:
+            _common._protocol_error(_common._COMMENT_CHECK, response)
+        if (
+            result is _common.CheckResponse.SPAM
+            and response.headers.get("X-akismet-pro-tip", "") == "discard"
+        ):
+            return _common.CheckResponse.DISCARD
+        return result
 
     async def submit_ham(self, user_ip: str, **kwargs: str) -> bool:
         """
@@ -489,17 +598,14 @@ class AsyncClient:
            defaults to 0.
 
         """
-        params = {}
-        for argument, value in (
-            ("month", month),
-            ("filter", url_filter),
-            ("format", result_format),
-            ("order", order),
-            ("limit", limit),
-            ("offset", offset),
-        ):
-            if value is not None:
-                params[argument] = value
+        params = {
+            argument: value
+            for argument, value in zip(
+                _common._KEY_SITES_PARAMS,
+                (month, url_filter, result_format, order, limit, offset),
+            )
+            if value is not None
+        }
         response = await self._get_request(_common._API_V12, _common._KEY_SITES, params)
         if result_format == "csv":
             return response.text
@@ -540,8 +646,101 @@ class AsyncClient:
         response = await self._request(
             "POST", _common._API_V11, _common._VERIFY_KEY, {"key": key, "blog": url}
         )
-        if response.text == "valid":
+        if response.content == b"valid":
             return True
-        if response.text == "invalid":
+        if response.content == b"invalid":
             return False
         _common._protocol_error(_common._VERIFY_KEY, response)
+
+    # Public convenience methods.
+    # ----------------------------------------------------------------------------
+
+    async def comment_check_many(
+        self, items: Iterable[dict], max_concurrency: int = 8
+    ) -> List["akismet.CheckResponse"]:
+        """
+        Check several pieces of user-submitted content to determine whether they are
+        spam, making the requests to Akismet concurrently.
+
+        Each item in ``items`` must be a :class:`dict` of the keyword arguments you
+        would pass to :meth:`comment_check` for that piece of content, and so must
+        contain at least ``user_ip``. The requests are run concurrently on the current
+        event loop, sharing this client's HTTP connection pool, and the return value is
+        a :class:`list` of :class:`~akismet.CheckResponse` values, in the same order as
+        ``items``.
+
+        If any of the checks raises an exception, the checks still in progress are
+        cancelled, and that exception will be raised from this method.
+
+        :param items: The keyword arguments for each piece of content to check.
+
+        :param max_concurrency: The maximum number of requests to have in flight at
+           once. Must be at least 1; defaults to 8.
+
+        :raises ValueError: When ``max_concurrency`` is less than 1.
+
+        :raises akismet.ProtocolError: When an unexpected/invalid response type is
+           received from the Akismet API.
+
+        """
+        return await self._call_many(self.comment_check, items, max_concurrency)
+
+    async def submit_ham_many(
+        self, items: Iterable[dict], max_concurrency: int = 8
+    ) -> List[bool]:
+        """
+        Inform Akismet that several pieces of user-submitted content are not spam,
+        making the requests to Akismet concurrently.
+
+        Each item in ``items`` must be a :class:`dict` of the keyword arguments you
+        would pass to :meth:`submit_ham` for that piece of content, and so must contain
+        at least ``user_ip``. The requests are run concurrently on the current event
+        loop, sharing this client's HTTP connection pool, and the return value is a
+        :class:`list` of :data:`True` values (one per item, in the same order as
+        ``items``) on success.
+
+        If any of the submissions raises an exception, the submissions still in
+        progress are cancelled, and that exception will be raised from this method.
+
+        :param items: The keyword arguments for each piece of content to submit.
+
+        :param max_concurrency: The maximum number of requests to have in flight at
+           once. Must be at least 1; defaults to 8.
+
+        :raises ValueError: When ``max_concurrency`` is less than 1.
+
+        :raises akismet.ProtocolError: When an unexpected/invalid response type is
+           received from the Akismet API.
+
+        """
+        return await self._call_many(self.submit_ham, items, max_concurrency)
+
+    async def submit_spam_many(
+        self, items: Iterable[dict], max_concurrency: int = 8
+    ) -> List[bool]:
+        """
+        Inform Akismet that several pieces of user-submitted content are spam,
+        making the requests to Akismet concurrently.
+
+        Each item in ``items`` must be a :class:`dict` of the keyword arguments you
+        would pass to :meth:`submit_spam` for that piece of content, and so must contain
+        at least ``user_ip``. The requests are run concurrently on the current event
+        loop, sharing this client's HTTP connection pool, and the return value is a
+        :class:`list` of :data:`True` values (one per item, in the same order as
+        ``items``) on success.
+
+        If any of the submissions raises an exception, the submissions still in
+        progress are cancelled, and that exception will be raised from this method.
+
+        :param items: The keyword arguments for each piece of content to submit.
+
+        :param max_concurrency: The maximum number of requests to have in flight at
+           once. Must be at least 1; defaults to 8.
+
+        :raises ValueError: When ``max_concurrency`` is less than 1.
+
+        :raises akismet.ProtocolError: When an unexpected/invalid response type is
+           received from the Akismet API.
+
+        """
+        return await self._call_many(self.submit_spam, items, max_concurrency)
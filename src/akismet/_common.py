@@ -6,9 +6,11 @@ Common definitions used by both the sync and async Akismet implementations.
 # SPDX-License-Identifier: BSD-3-Clause
 
 import enum
+import importlib.util
 import os
 import sys
-import textwrap
+import threading
+import time
 import typing
 
 import httpx
@@ -23,37 +25,120 @@ _API_V11 = "1.1"
 _API_V12 = "1.2"
 _COMMENT_CHECK = "comment-check"
 _KEY_SITES = "key-sites"
+_KEY_SITES_PARAMS = ("month", "filter", "format", "order", "limit", "offset")
 _REQUEST_METHODS = typing.Literal["GET", "POST"]  # pylint: disable=invalid-name
-_SUBMISSION_RESPONSE = "Thanks for making the web a better place."
+_SUBMISSION_RESPONSE = b"Thanks for making the web a better place."
 _SUBMIT_HAM = "submit-ham"
 _SUBMIT_SPAM = "submit-spam"
 _USAGE_LIMIT = "usage-limit"
 _VERIFY_KEY = "verify-key"
 
+# Full URLs of each API endpoint, keyed by (version, endpoint), so that request methods
+# look them up rather than building the same string on every call. They're stored as
+# already-parsed httpx.URL objects, which httpx uses without parsing them again.
+_API_URLS = {
+    (version, endpoint): httpx.URL(f"{_API_URL}/{version}/{endpoint}")
+    for version in (_API_V11, _API_V12)
+    for endpoint in (
+        _COMMENT_CHECK,
+        _KEY_SITES,
+        _SUBMIT_HAM,
+        _SUBMIT_SPAM,
+        _USAGE_LIMIT,
+        _VERIFY_KEY,
+    )
+}
+
+# Error-message templates, laid out as they should appear, so that building an error
+# message needs only a str.format() call.
+
+_INVALID_CONFIG_MESSAGE = """
+Akismet API key and/or blog URL were invalid.
+
+Found API key: {key}
+Found blog URL: {url}
+"""
+
+_INVALID_URL_MESSAGE = """
+Invalid Akismet site URL specified: {url}
+
+Akismet requires the full URL including the leading
+'http://' or 'https://'.
+"""
+
+_MISSING_CONFIG_MESSAGE = """
+Could not find full Akismet configuration.
+
+Found API key: {key}
+Found blog URL: {url}
+"""
+
+_PROTOCOL_ERROR_MESSAGE = """
+Received unexpected or non-standard response from Akismet API.
+
+API operation was: {operation}
+API response received was: {response_text}
+Debug header value was: {debug_help}
+"""
+
+_URL_SCHEMES = ("http://", "https://")
+
 _KEY_ENV_VAR = "PYTHON_AKISMET_API_KEY"
 _URL_ENV_VAR = "PYTHON_AKISMET_BLOG_URL"
 
 _TIMEOUT = float(os.getenv("PYTHON_AKISMET_TIMEOUT", "1.0"))
 
-_OPTIONAL_KEYS = [
-    "blog_charset",
-    "blog_lang",
-    "comment_author",
-    "comment_author_email",
-    "comment_author_url",
-    "comment_content",
-    "comment_context",
-    "comment_date_gmt",
-    "comment_post_modified_gmt",
-    "comment_type",
-    "honeypot_field_name",
-    "is_test",
-    "permalink",
-    "recheck_reason",
-    "referrer",
-    "user_agent",
-    "user_role",
-]
+# Connection-pool limits for the default HTTP clients. The sizes are HTTPX's defaults;
+# the keep-alive expiry is raised from HTTPX's 5 seconds so that sites making occasional
+# requests can still reuse an open connection instead of paying for a new TLS handshake.
+_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0
+)
+
+# Whether the default HTTP clients should use HTTP/2. HTTPX only supports HTTP/2 when
+# its optional dependency h2 is installed (for example, via "pip install
+# akismet[http2]"), so this is enabled only when h2 is available. Over HTTP/2,
+# concurrent requests (such as those made by comment_check_many()) can share a single
+# connection to Akismet.
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Configurations which have been successfully verified with Akismet by this process,
+# mapped to the time.monotonic() value at which they were verified. The
+# validated_client() constructors and the legacy Akismet class consult this (via
+# _is_verified()) before calling verify_key(), so that creating several clients with the
+# same key and URL only costs one round trip to Akismet per _VERIFICATION_TTL
+# seconds. Only successful verifications are recorded; explicit calls to verify_key()
+# always go to Akismet, and a configuration is dropped again as soon as Akismet reports
+# its key as invalid. Entries are kept in order of verification, and at most
+# _VERIFIED_CONFIGS_MAXSIZE of them are retained. Clients may be constructed from many
+# threads at once (for example, one per request in a threaded WSGI server), so every
+# change to the cache is made while holding _VERIFIED_CONFIGS_LOCK.
+_VERIFIED_CONFIGS: typing.Dict["Config", float] = {}
+_VERIFIED_CONFIGS_LOCK = threading.Lock()
+_VERIFIED_CONFIGS_MAXSIZE = 128
+_VERIFICATION_TTL = 3600.0
+
+_OPTIONAL_KEYS = frozenset(
+    {
+        "blog_charset",
+        "blog_lang",
+        "comment_author",
+        "comment_author_email",
+        "comment_author_url",
+        "comment_content",
+        "comment_context",
+        "comment_date_gmt",
+        "comment_post_modified_gmt",
+        "comment_type",
+        "honeypot_field_name",
+        "is_test",
+        "permalink",
+        "recheck_reason",
+        "referrer",
+        "user_agent",
+        "user_role",
+    }
+)
 
 
 # Public constants.
@@ -64,6 +149,10 @@ USER_AGENT = (
     f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
 )
 
+# The default headers sent by the HTTP clients created in this module. Built once, at
+# import time, rather than every time a default HTTP client is constructed.
+_DEFAULT_HEADERS = {"User-Agent": USER_AGENT}
+
 
 # Public classes.
 # -------------------------------------------------------------------------------
@@ -81,6 +170,11 @@ class CheckResponse(enum.IntEnum):
     DISCARD = 2
 
 
+# Raw comment-check response bodies and the result each one maps to, so that decoding a
+# response is a single dictionary lookup.
+_CHECK_RESPONSES = {b"false": CheckResponse.HAM, b"true": CheckResponse.SPAM}
+
+
 class Config(typing.NamedTuple):
     """
     A :func:`~collections.namedtuple` representing Akismet configuration, consisting
@@ -96,6 +190,25 @@ class Config(typing.NamedTuple):
     url: str
 
 
+# Public functions.
+# -------------------------------------------------------------------------------
+
+
+def clear_verify_cache() -> None:
+    """
+    Forget every Akismet configuration this process has successfully verified.
+
+    The ``validated_client()`` constructors remember a successful verification for
+    an hour, and skip verifying the same configuration again during that time. Call
+    this function to make the next ``validated_client()`` call verify with Akismet
+    again -- for example, between tests which construct clients with mock HTTP
+    clients returning different responses to the key-verification request.
+
+    """
+    with _VERIFIED_CONFIGS_LOCK:
+        _VERIFIED_CONFIGS.clear()
+
+
 # Private helper functions.
 # -------------------------------------------------------------------------------
 
@@ -105,7 +218,9 @@ def _get_async_http_client() -> httpx.AsyncClient:
     Return an asynchronous HTTP client for interacting with the Akismet API.
 
     """
-    return httpx.AsyncClient(headers={"User-Agent": USER_AGENT}, timeout=_TIMEOUT)
+    return httpx.AsyncClient(
+        headers=_DEFAULT_HEADERS, http2=_HTTP2, limits=_LIMITS, timeout=_TIMEOUT
+    )
 
 
 def _get_sync_http_client() -> httpx.Client:
@@ -113,7 +228,54 @@ def _get_sync_http_client() -> httpx.Client:
     Return a synchronous HTTP client for interacting with the Akismet API.
 
     """
-    return httpx.Client(headers={"User-Agent": USER_AGENT}, timeout=_TIMEOUT)
+    return httpx.Client(
+        headers=_DEFAULT_HEADERS, http2=_HTTP2, limits=_LIMITS, timeout=_TIMEOUT
+    )
+
+
+def _is_verified(config: Config) -> bool:
+    """
+    Return whether the given configuration was successfully verified by this process
+    within the last ``_VERIFICATION_TTL`` seconds.
+
+    """
+    verified_at = _VERIFIED_CONFIGS.get(config)
+    return (
+        verified_at is not None and time.monotonic() - verified_at < _VERIFICATION_TTL
+    )
+
+
+def _mark_verified(config: Config) -> None:
+    """
+    Record that the given configuration was just successfully verified.
+
+    Expired entries are pruned, and if the cache is still full the least-recently
+    verified configurations are evicted to make room.
+
+    """
+    with _VERIFIED_CONFIGS_LOCK:
+        now = time.monotonic()
+        # Remove any existing entry first, so that re-inserting it moves it to the end
+        # and the dict stays ordered by verification time.
+        _VERIFIED_CONFIGS.pop(config, None)
+        while _VERIFIED_CONFIGS:
+            oldest = next(iter(_VERIFIED_CONFIGS))
+            if (
+                len(_VERIFIED_CONFIGS) < _VERIFIED_CONFIGS_MAXSIZE
+                and now - _VERIFIED_CONFIGS[oldest] < _VERIFICATION_TTL
+            ):
+                break
+            del _VERIFIED_CONFIGS[oldest]
+        _VERIFIED_CONFIGS[config] = now
+
+
+def _forget_verified(config: Config) -> None:
+    """
+    Remove any record of the given configuration having been successfully verified.
+
+    """
+    with _VERIFIED_CONFIGS_LOCK:
+        _VERIFIED_CONFIGS.pop(config, None)
 
 
 def _protocol_error(operation: str, response: httpx.Response) -> typing.NoReturn:
@@ -122,14 +284,10 @@ def _protocol_error(operation: str, response: httpx.Response) -> typing.NoReturn
 
     """
     raise _exceptions.ProtocolError(
-        textwrap.dedent(
-            f"""
-        Received unexpected or non-standard response from Akismet API.
-
-        API operation was: {operation}
-        API response received was: {response.text}
-        Debug header value was: {response.headers.get('X-akismet-debug-help', None)}
-        """
+        _PROTOCOL_ERROR_MESSAGE.format(
+            operation=operation,
+            response_text=response.text,
+            debug_help=response.headers.get("X-akismet-debug-help", None),
         )
     )
 
@@ -145,26 +303,10 @@ def _try_discover_config() -> Config:
     """
     key = os.getenv(_KEY_ENV_VAR, None)
     url = os.getenv(_URL_ENV_VAR, None)
-    if not all([key, url]):
-        raise _exceptions.ConfigurationError(
-            textwrap.dedent(
-                f"""
-        Could not find full Akismet configuration.
-
-        Found API key: {key}
-        Found blog URL: {url}
-        """
-            )
-        )
-    if not url.startswith(("http://", "https://")):
+    if not key or not url:
         raise _exceptions.ConfigurationError(
-            textwrap.dedent(
-                f"""
-            Invalid Akismet site URL specified: {url}
-
-            Akismet requires the full URL including the leading
-            'http://' or 'https://'.
-            """
-            )
+            _MISSING_CONFIG_MESSAGE.format(key=key, url=url)
         )
+    if not url.startswith(_URL_SCHEMES):
+        raise _exceptions.ConfigurationError(_INVALID_URL_MESSAGE.format(url=url))
     return Config(key=key, url=url)
@@ -6,7 +6,6 @@ Legacy/deprecated Akismet client.
 # SPDX-License-Identifier: BSD-3-Clause
 
 import os
-import textwrap
 import warnings
 from typing import Optional
 
@@ -14,6 +13,38 @@ import httpx
 
 from . import _common, _exceptions
 
+# Messages specific to the legacy client; the templates it shares with the other
+# clients live in _common.
+
+_DEPRECATION_MESSAGE = """
+The akismet.Akismet API client is deprecated and will be removed in
+version 2.0. Please migrate to either akismet.SyncClient or
+akismet.AsyncClient."""
+
+_INVALID_URL_MESSAGE = """
+Invalid site URL specified: {blog_url}
+
+Akismet requires the full URL including the leading
+'http://' or 'https://'.
+"""
+
+# HTTP client shared by all instances of the legacy client which aren't given one of
+# their own, created on first use so that its connection pool is reused across
+# instances and verify_key() calls. It is replaced with a new one if it has been closed.
+_SHARED_SYNC_CLIENT: Optional[httpx.Client] = None
+
+
+def _get_shared_sync_client() -> httpx.Client:
+    """
+    Return the shared default HTTP client for the legacy Akismet client, creating it
+    if it doesn't already exist or has been closed.
+
+    """
+    global _SHARED_SYNC_CLIENT  # pylint: disable=global-statement
+    if _SHARED_SYNC_CLIENT is None or _SHARED_SYNC_CLIENT.is_closed:
+        _SHARED_SYNC_CLIENT = _common._get_sync_http_client()
+    return _SHARED_SYNC_CLIENT
+
 
 class Akismet:
     """
@@ -44,7 +75,9 @@ class Akismet:
 
     The verify_key operation will be automatically called for you as this class is
     instantiated; :exc:`~akismet.ConfigurationError` will be raised if the configuration
-    cannot be found or if the supplied key/URL are invalid.
+    cannot be found or if the supplied key/URL are invalid. A successful verification is
+    remembered by the process for an hour, so instantiating this class again with the
+    same key/URL during that time will not repeat it.
 
     """
 
@@ -53,7 +86,19 @@ class Akismet:
     SUBMIT_SPAM_URL = "https://rest.akismet.com/1.1/submit-spam"
     VERIFY_KEY_URL = "https://rest.akismet.com/1.1/verify-key"
 
+    # Pre-parsed forms of the endpoint URLs above, so httpx doesn't re-parse them on
+    # every request. Lookups fall back to the plain string, so a subclass which
+    # overrides one of the URLs still works.
+    _PARSED_URLS = {
+        url: httpx.URL(url)
+        for url in (COMMENT_CHECK_URL, SUBMIT_HAM_URL, SUBMIT_SPAM_URL, VERIFY_KEY_URL)
+    }
+
     SUBMIT_SUCCESS_RESPONSE = "Thanks for making the web a better place."
+    _SUBMIT_SUCCESS_CONTENT = SUBMIT_SUCCESS_RESPONSE.encode()
+
+    _CHECK_RESPONSES = {b"true": True, b"false": False}
+    _VERIFY_RESPONSES = {b"valid": True, b"invalid": False}
 
     OPTIONAL_KEYS = [
         "blog_charset",
@@ -80,36 +125,23 @@ class Akismet:
         blog_url: Optional[str] = None,
         http_client: Optional[httpx.Client] = None,
     ):
-        warnings.warn(
-            textwrap.dedent(
-                """
-            The akismet.Akismet API client is deprecated and will be removed in
-            version 2.0. Please migrate to either akismet.SyncClient or
-            akismet.AsyncClient.  """,
-            ),
-            DeprecationWarning,
-            stacklevel=2,
-        )
+        warnings.warn(_DEPRECATION_MESSAGE, DeprecationWarning, stacklevel=2)
         maybe_key = key if key is not None else os.getenv(_common._KEY_ENV_VAR, "")
         maybe_url = (
             blog_url if blog_url is not None else os.getenv(_common._URL_ENV_VAR, "")
         )
         if maybe_key == "" or maybe_url == "":
             raise _exceptions.ConfigurationError(
-                textwrap.dedent(
-                    f"""
-                Could not find full Akismet configuration.
-
-                Found API key: {maybe_key}
-                Found blog URL: {maybe_url}
-                """
-                )
-            )
-        self.http_client = http_client or _common._get_sync_http_client()
-        if not self.verify_key(maybe_key, maybe_url, http_client=self.http_client):
-            raise _exceptions.APIKeyError(
-                f"Akismet key ({maybe_key}, {maybe_url}) is invalid."
+                _common._MISSING_CONFIG_MESSAGE.format(key=maybe_key, url=maybe_url)
             )
+        self.http_client = http_client or _get_shared_sync_client()
+        config = _common.Config(key=maybe_key, url=maybe_url)
+        if not _common._is_verified(config):
+            if not self.verify_key(maybe_key, maybe_url, http_client=self.http_client):
+                raise _exceptions.APIKeyError(
+                    f"Akismet key ({maybe_key}, {maybe_url}) is invalid."
+                )
+            _common._mark_verified(config)
         self.api_key = maybe_key
         self.blog_url = maybe_url
 
@@ -124,10 +156,10 @@ class Akismet:
         and supply certain basic data.
 
         """
-        unknown_args = [k for k in kwargs if k not in self.OPTIONAL_KEYS]
+        unknown_args = sorted(k for k in kwargs if k not in self.OPTIONAL_KEYS)
         if unknown_args:
             raise _exceptions.UnknownArgumentError(
-                "Unknown arguments while making request: {', '.join(unknown_args)}."
+                "Unknown arguments while making request: " f"{', '.join(unknown_args)}."
             )
 
         data = {
@@ -137,7 +169,9 @@ class Akismet:
             "user_agent": user_agent,
             **kwargs,
         }
-        return self.http_client.post(endpoint, data=data)
+        return self.http_client.post(
+            self._PARSED_URLS.get(endpoint, endpoint), data=data
+        )
 
     def _submission_request(  # pylint: disable=inconsistent-return-statements
         self, operation: str, user_ip: str, user_agent: str, **kwargs: str
@@ -146,12 +180,11 @@ class Akismet:
         Submit spam or ham to the Akismet API.
 
         """
-        endpoint = {
-            "submit_spam": self.SUBMIT_SPAM_URL,
-            "submit_ham": self.SUBMIT_HAM_URL,
-        }[operation]
+        endpoint = (
+            self.SUBMIT_SPAM_URL if operation == "submit_spam" else self.SUBMIT_HAM_URL
+        )
         response = self._api_request(endpoint, user_ip, user_agent, **kwargs)
-        if response.text == self.SUBMIT_SUCCESS_RESPONSE:
+        if response.content == self._SUBMIT_SUCCESS_CONTENT:
             return True
         self._protocol_error(operation, response)
 
@@ -162,19 +195,15 @@ class Akismet:
 
         """
         raise _exceptions.ProtocolError(
-            textwrap.dedent(
-                f"""
-            Received unexpected or non-standard response from Akismet API.
-
-            API operation was: {operation}
-            API response received was: {response.text}
-            Debug header value was: {response.headers.get('X-akismet-debug-help')}
-            """
+            _common._PROTOCOL_ERROR_MESSAGE.format(
+                operation=operation,
+                response_text=response.text,
+                debug_help=response.headers.get("X-akismet-debug-help"),
             )
         )
 
     @classmethod
-    def verify_key(  # pylint: disable=inconsistent-return-statements
+    def verify_key(
         cls, key: str, blog_url: str, http_client: Optional[httpx.Client] = None
     ) -> bool:
         """
@@ -183,32 +212,22 @@ class Akismet:
         Returns :data:`True` if the key and URL are valid, :data:`False` otherwise.
 
         """
-        if not blog_url.startswith(("http://", "https://")):
+        if not blog_url.startswith(_common._URL_SCHEMES):
             raise _exceptions.ConfigurationError(
-                textwrap.dedent(
-                    f"""
-                Invalid site URL specified: {blog_url}
-
-                Akismet requires the full URL including the leading
-                'http://' or 'https://'.
-                """
-                )
+                _INVALID_URL_MESSAGE.format(blog_url=blog_url)
             )
-        if http_client is None:  # pragma: no cover
-            http_client = _common._get_sync_http_client()
+        if http_client is None:
+            http_client = _get_shared_sync_client()
         response = http_client.post(
-            cls.VERIFY_KEY_URL,
+            cls._PARSED_URLS.get(cls.VERIFY_KEY_URL, cls.VERIFY_KEY_URL),
             data={"key": key, "blog": blog_url},
         )
-        if response.text == "valid":
-            return True
-        if response.text == "invalid":
-            return False
-        cls._protocol_error("verify_key", response)
+        result = cls._VERIFY_RESPONSES.get(response.content)
+        if result is None:
+            cls._protocol_error("verify_key", response)
+        return result
 
-    def comment_check(  # pylint: disable=inconsistent-return-statements
-        self, user_ip: str, user_agent: str, **kwargs: str
-    ) -> bool:
+    def comment_check(self, user_ip: str, user_agent: str, **kwargs: str) -> bool:
         """
         Check a comment to determine whether it is spam.
 
@@ -225,11 +244,10 @@ class Akismet:
         response = self._api_request(
             self.COMMENT_CHECK_URL, user_ip, user_agent, **kwargs
         )
-        if response.text == "true":
-            return True
-        if response.text == "false":
-            return False
-        self._protocol_error("comment_check", response)
+        result = self._CHECK_RESPONSES.get(response.content)
+        if result is None:
+            self._protocol_error("comment_check", response)
+        return result
 
     def submit_spam(self, user_ip: str, user_agent: str, **kwargs: str) -> bool:
         """
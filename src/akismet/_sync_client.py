@@ -5,8 +5,8 @@ Synchronous Akismet API client implementation.
 
 # SPDX-License-Identifier: BSD-3-Clause
 
-import textwrap
-from typing import TYPE_CHECKING, Optional, Union
+import concurrent.futures
+from typing import TYPE_CHECKING, Any, Callable, Iterable, List, Optional, Union
 
 import httpx
 
@@ -138,6 +138,12 @@ class SyncClient:
         read from the environment variable ``PYTHON_AKISMET_API_KEY``, and the
         registered site URL from the environment variable ``PYTHON_AKISMET_BLOG_URL``.
 
+        A successful verification is remembered by the process for an hour, so
+        constructing further clients with the same configuration during that time will
+        not make another request to Akismet. Call :func:`~akismet.clear_verify_cache` to
+        forget remembered verifications (for example, between tests which use mock HTTP
+        clients).
+
         :param http_client: An optional custom ``httpx`` HTTP client instance to
            use. Generally you should only pass this in if you need significantly
            customized HTTP-client behavior, and if you do pass this argument you are
@@ -165,19 +171,54 @@ class SyncClient:
         # constructor in order to achieve API consistency.
         config = _common._try_discover_config()
         instance = cls(config=config, http_client=http_client)
+        if _common._is_verified(config):
+            return instance
         if not instance.verify_key(config.key, config.url):
             raise _exceptions.APIKeyError(
-                textwrap.dedent(
-                    f"""
-                    Akismet API key and/or blog URL were invalid.
-
-                    Found API key: {config.key}
-                    Found blog URL: {config.url}
-                    """
-                )
+                _common._INVALID_CONFIG_MESSAGE.format(key=config.key, url=config.url)
             )
+        _common._mark_verified(config)
         return instance
 
+    # Resource management.
+    # ----------------------------------------------------------------------------
+
+    def close(self) -> None:
+        """
+        Close this client's underlying HTTP client, releasing its pooled
+        connections.
+
+        The client cannot be used to make further requests after this. You can also
+        use the client as a context manager, in which case it will be closed
+        automatically at the end of the ``with`` block:
+
+        .. code-block:: python
+
+           import akismet
+
+           with akismet.SyncClient.validated_client() as akismet_client:
+               akismet_client.comment_check(...)
+
+        If you passed in a custom HTTP client which is shared with other code, do not
+        call this method; close the HTTP client yourself once nothing is using it.
+
+        """
+        self._http_client.close()
+
+    def __enter__(self) -> "SyncClient":
+        """
+        Enter a ``with`` block, returning this client.
+
+        """
+        return self
+
+    def __exit__(self, *args) -> None:
+        """
+        Exit a ``with`` block, closing this client.
+
+        """
+        self.close()
+
     # Internal/helper methods.
     # ----------------------------------------------------------------------------
 
@@ -208,11 +249,10 @@ class SyncClient:
             raise _exceptions.AkismetError(
                 f"Unrecognized request method attempted: {method}."
             )
-        handler = getattr(self._http_client, method.lower())
         request_kwarg = "data" if method == "POST" else "params"
         try:
-            response = handler(
-                f"{_common._API_URL}/{version}/{endpoint}", **{request_kwarg: data}
+            response = self._http_client.request(
+                method, _common._API_URLS[(version, endpoint)], **{request_kwarg: data}
             )
             response.raise_for_status()
         except httpx.HTTPStatusError as exc:
@@ -223,12 +263,11 @@ class SyncClient:
             raise _exceptions.RequestError("Akismet timed out.") from exc
         except httpx.RequestError as exc:
             raise _exceptions.RequestError("Error making request to Akismet.") from exc
-        except Exception as exc:
-            raise _exceptions.RequestError("Error making request to Akismet.") from exc
         # Since it's possible to construct a client without performing up-front API key
         # validation, we have to watch out here for the possibility that we're making
         # requests with an invalid key, and raise the appropriate exception.
-        if endpoint != _common._VERIFY_KEY and response.text == "invalid":
+        if endpoint != _common._VERIFY_KEY and response.content == b"invalid":
+            _common._forget_verified(self._config)
             raise _exceptions.APIKeyError(
                 "Akismet API key and/or site URL are invalid."
             )
@@ -275,11 +314,11 @@ class SyncClient:
            optional argument names.
 
         """
-        unknown_args = [k for k in kwargs if k not in _common._OPTIONAL_KEYS]
+        unknown_args = kwargs.keys() - _common._OPTIONAL_KEYS
         if unknown_args:
             raise _exceptions.UnknownArgumentError(
-                f"Received unknown argument(s) for Akismet operation {endpoint}"
-                f"{', '.join(unknown_args)}"
+                f"Received unknown argument(s) for Akismet operation {endpoint}: "
+                f"{', '.join(sorted(unknown_args))}"
             )
         data = {
             "api_key": self._config.key,
@@ -305,10 +344,33 @@ class SyncClient:
         response = self._post_request(
             _common._API_V11, endpoint, user_ip=user_ip, **kwargs
         )
-        if response.text == _common._SUBMISSION_RESPONSE:
+        if response.content == _common._SUBMISSION_RESPONSE:
             return True
         _common._protocol_error(endpoint, response)
 
+    def _call_many(
+        self, method: Callable[..., Any], items: Iterable[dict], max_concurrency: int
+    ) -> list:
+        """
+        Call one of this client's API methods once for each item, concurrently, and
+        return the results in the same order as the items.
+
+        :param method: The API method to call.
+
+        :param items: The keyword arguments for each call.
+
+        :param max_concurrency: The maximum number of calls to have in flight at once.
+
+        :raises ValueError: When ``max_concurrency`` is less than 1.
+
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be greater than 0")
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_concurrency
+        ) as executor:
+            return list(executor.map(lambda item: method(**item), items))
+
     # Public methods corresponding to the methods of the Akismet API.
     # ----------------------------------------------------------------------------
 
@@ -358,13 +420,15 @@ class SyncClient:
         response = self._post_request(
             _common._API_V11, _common._COMMENT_CHECK, user_ip=user_ip, **kwargs
         )
-        if response.text == "true":
-            if response.headers.get("X-akismet-pro-tip", "") == "discard":
-                return _common.CheckResponse.DISCARD
-            return _common.CheckResponse.SPAM
-        if response.text == "false":
-            return _common.CheckResponse.HAM
-        _common._protocol_error(_common._COMMENT_CHECK, response)
+        result = _common._CHECK_RESPONSES.get(response.content)
+        if result is None:
+            _common._protocol_error(_common._COMMENT_CHECK, response)
+        if (
+            result is _common.CheckResponse.SPAM
+            and response.headers.get("X-akismet-pro-tip", "") == "discard"
+        ):
+            return _common.CheckResponse.DISCARD
+        return result
 
     def submit_ham(self, user_ip: str, **kwargs: str) -> bool:
         """
@@ -484,17 +548,14 @@ class SyncClient:
            defaults to 0.
 
         """
-        params = {}
-        for argument, value in (
-            ("month", month),
-            ("filter", url_filter),
-            ("format", result_format),
-            ("order", order),
-            ("limit", limit),
-            ("offset", offset),
-        ):
-            if value is not None:
-                params[argument] = value
+        params = {
+            argument: value
+            for argument, value in zip(
+                _common._KEY_SITES_PARAMS,
+                (month, url_filter, result_format, order, limit, offset),
+            )
+            if value is not None
+        }
         response = self._get_request(_common._API_V12, _common._KEY_SITES, params)
         if result_format == "csv":
             return response.text
@@ -535,8 +596,99 @@ class SyncClient:
         response = self._request(
             "POST", _common._API_V11, _common._VERIFY_KEY, {"key": key, "blog": url}
         )
-        if response.text == "valid":
+        if response.content == b"valid":
             return True
-        if response.text == "invalid":
+        if response.content == b"invalid":
             return False
         _common._protocol_error(_common._VERIFY_KEY, response)
+
+    # Public convenience methods.
+    # ----------------------------------------------------------------------------
+
+    def comment_check_many(
+        self, items: Iterable[dict], max_concurrency: int = 8
+    ) -> List["akismet.CheckResponse"]:
+        """
+        Check several pieces of user-submitted content to determine whether they are
+        spam, making the requests to Akismet concurrently.
+
+        Each item in ``items`` must be a :class:`dict` of the keyword arguments you
+        would pass to :meth:`comment_check` for that piece of content, and so must
+        contain at least ``user_ip``. The requests are made from a pool of threads
+        which share this client's HTTP connection pool, and the return value is a
+        :class:`list` of :class:`~akismet.CheckResponse` values, in the same order as
+        ``items``.
+
+        If any of the checks raises an exception, that exception will be raised from
+        this method.
+
+        :param items: The keyword arguments for each piece of content to check.
+
+        :param max_concurrency: The maximum number of requests to have in flight at
+           once. Must be at least 1; defaults to 8.
+
+        :raises ValueError: When ``max_concurrency`` is less than 1.
+
+        :raises akismet.ProtocolError: When an unexpected/invalid response type is
+           received from the Akismet API.
+
+        """
+        return self._call_many(self.comment_check, items, max_concurrency)
+
+    def submit_ham_many(
+        self, items: Iterable[dict], max_concurrency: int = 8
+    ) -> List[bool]:
+        """
+        Inform Akismet that several pieces of user-submitted content are not spam,
+        making the requests to Akismet concurrently.
+
+        Each item in ``items`` must be a :class:`dict` of the keyword arguments you
+        would pass to :meth:`submit_ham` for that piece of content, and so must contain
+        at least ``user_ip``. The requests are made from a pool of threads which share
+        this client's HTTP connection pool, and the return value is a :class:`list` of
+        :data:`True` values (one per item, in the same order as ``items``) on success.
+
+        If any of the submissions raises an exception, that exception will be raised
+        from this method.
+
+        :param items: The keyword arguments for each piece of content to submit.
+
+        :param max_concurrency: The maximum number of requests to have in flight at
+           once. Must be at least 1; defaults to 8.
+
+        :raises ValueError: When ``max_concurrency`` is less than 1.
+
+        :raises akismet.ProtocolError: When an unexpected/invalid response type is
+           received from the Akismet API.
+
+        """
+        return self._call_many(self.submit_ham, items, max_concurrency)
+
+    def submit_spam_many(
+        self, items: Iterable[dict], max_concurrency: int = 8
+    ) -> List[bool]:
+        """
+        Inform Akismet that several pieces of user-submitted content are spam,
+        making the requests to Akismet concurrently.
+
+        Each item in ``items`` must be a :class:`dict` of the keyword arguments you
+        would pass to :meth:`submit_spam` for that piece of content, and so must contain
+        at least ``user_ip``. The requests are made from a pool of threads which share
+        this client's HTTP connection pool, and the return value is a :class:`list` of
+        :data:`True` values (one per item, in the same order as ``items``) on success.
+
+        If any of the submissions raises an exception, that exception will be raised
+        from this method.
+
+        :param items: The keyword arguments for each piece of content to submit.
+
+        :param max_concurrency: The maximum number of requests to have in flight at
+           once. Must be at least 1; defaults to 8.
+
+        :raises ValueError: When ``max_concurrency`` is less than 1.
+
+        :raises akismet.ProtocolError: When an unexpected/invalid response type is
+           received from the Akismet API.
+
+        """
+        return self._call_many(self.submit_spam, items, max_concurrency)
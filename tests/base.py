@@ -5,6 +5,7 @@ Base test class and utilities.
 
 # SPDX-License-Identifier: BSD-3-Clause
 
+import contextlib
 import os
 import typing
 import unittest
@@ -16,6 +17,10 @@ import httpx
 import akismet
 from akismet import _common
 
+# Every HTTP status code indicating an error, which the clients should all turn into
+# RequestError.
+ERROR_STATUS_CODES = tuple(code for code in HTTPStatus if 400 <= code <= 599)
+
 
 class AkismetTests(unittest.TestCase):
     """
@@ -26,14 +31,40 @@ class AkismetTests(unittest.TestCase):
 
     api_key = os.getenv("PYTHON_AKISMET_API_KEY")
     site_url = os.getenv("PYTHON_AKISMET_BLOG_URL")
-    verify_key_url = f"{_common._API_URL}/{_common._API_V11}/{_common._VERIFY_KEY}"
+    verify_key_url = _common._API_URLS[(_common._API_V11, _common._VERIFY_KEY)]
 
     config = akismet.Config(key="fake-test-key", url="http://example.com")
     common_kwargs = {"user_ip": "127.0.0.1"}
 
+    def setUp(self):
+        """
+        Forget any configurations verified by earlier tests.
+
+        """
+        super().setUp()
+        akismet.clear_verify_cache()
+
+    @contextlib.contextmanager
+    def patched_environ(
+        self, variables: typing.Dict[str, typing.Optional[str]]
+    ) -> typing.Iterator[None]:
+        """
+        Context manager which temporarily sets the given environment variables (or,
+        for a value of ``None``, removes them), restoring the original environment on
+        exit.
+
+        """
+        with mock.patch.dict(os.environ):
+            for name, value in variables.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+            yield
+
     def custom_response_transport(  # pylint: disable=too-many-arguments
         self,
-        response_text: str = "true",
+        response_text: typing.Union[str, bytes] = "true",
         status_code: HTTPStatus = HTTPStatus.OK,
         response_json: typing.Optional[dict] = None,
         headers: typing.Optional[dict] = None,
@@ -55,27 +86,54 @@ class AkismetTests(unittest.TestCase):
         ``True`` (the default) and fail if it is ``False``
 
         """
+        response_kwargs: typing.Dict[str, typing.Any] = {"status_code": status_code}
+        if headers is not None:
+            response_kwargs["headers"] = headers
+        verify_key_kwargs = {
+            **response_kwargs,
+            "content": "valid" if config_valid else "invalid",
+        }
+        if response_json is not None:
+            response_kwargs["json"] = response_json
+        else:
+            response_kwargs["content"] = response_text
 
         def _handler(request: httpx.Request) -> httpx.Response:
             """
             Mock transport handler which returns a controlled response.
 
             """
-            response_kwargs = {"status_code": status_code, "content": response_text}
-            if headers is not None:
-                response_kwargs["headers"] = headers
-            if response_json is not None:
-                del response_kwargs["content"]
-                response_kwargs["json"] = response_json
             if request.url == self.verify_key_url:
-                response_kwargs["content"] = "valid" if config_valid else "invalid"
+                return httpx.Response(**verify_key_kwargs)
+            return httpx.Response(**response_kwargs)
+
+        return httpx.MockTransport(_handler)
+
+    def fixed_response_transport(
+        self, response_text: typing.Union[str, bytes]
+    ) -> httpx.MockTransport:
+        """
+        Return an ``httpx`` transport that responds to every request -- including
+        ``verify_key`` -- with a 200 status and the given response text, for use in
+        testing.
+
+        """
+        response_kwargs = {"status_code": HTTPStatus.OK, "content": response_text}
+
+        def _handler(  # pylint: disable=unused-argument
+            request: httpx.Request,
+        ) -> httpx.Response:
+            """
+            Mock transport handler which returns a fixed response.
+
+            """
             return httpx.Response(**response_kwargs)
 
         return httpx.MockTransport(_handler)
 
     def custom_response_sync_client(  # pylint: disable=too-many-arguments
         self,
-        response_text: str = "true",
+        response_text: typing.Union[str, bytes] = "true",
         status_code: HTTPStatus = HTTPStatus.OK,
         response_json: typing.Optional[dict] = None,
         headers: typing.Optional[dict] = None,
@@ -94,7 +152,7 @@ class AkismetTests(unittest.TestCase):
 
     def custom_response_async_client(  # pylint: disable=too-many-arguments
         self,
-        response_text: str = "true",
+        response_text: typing.Union[str, bytes] = "true",
         status_code: HTTPStatus = HTTPStatus.OK,
         response_json: typing.Optional[dict] = None,
         headers: typing.Optional[dict] = None,
@@ -111,6 +169,24 @@ class AkismetTests(unittest.TestCase):
             )
         )
 
+    def exception_transport(
+        self, exception_class: Exception, message: str = "Error!"
+    ) -> httpx.MockTransport:
+        """
+        Return an ``httpx`` transport that raises the given exception/message for
+        every request, for use in testing.
+
+        """
+
+        def _handler(request: httpx.Request) -> httpx.Response:
+            """
+            Mock transport handler which raises a controlled exception.
+
+            """
+            raise exception_class(message)
+
+        return httpx.MockTransport(_handler)
+
     def exception_sync_client(
         self, exception_class: Exception, message: str = "Error!"
     ) -> httpx.Client:
@@ -118,10 +194,8 @@ class AkismetTests(unittest.TestCase):
         Return a synchronous HTTP client that raises the given exception/message.
 
         """
-        return mock.Mock(
-            spec_set=httpx.Client,
-            get=mock.Mock(side_effect=exception_class(message)),
-            post=mock.Mock(side_effect=exception_class(message)),
+        return httpx.Client(
+            transport=self.exception_transport(exception_class, message)
         )
 
     def exception_async_client(
@@ -131,10 +205,8 @@ class AkismetTests(unittest.TestCase):
         Return an asynchronous HTTP client that raises the given exception/message.
 
         """
-        return mock.AsyncMock(
-            spec_set=httpx.AsyncClient,
-            get=mock.AsyncMock(side_effect=exception_class(message)),
-            post=mock.AsyncMock(side_effect=exception_class(message)),
+        return httpx.AsyncClient(
+            transport=self.exception_transport(exception_class, message)
         )
 
 
@@ -6,7 +6,9 @@ Akismet web service.
 
 # SPDX-License-Identifier: BSD-3-Clause
 
+import asyncio
 import os
+import unittest
 
 import akismet
 from akismet import _common
@@ -21,7 +23,15 @@ BAD_URL = "http://example.com"
 HAM_ROLE = "administrator"
 SPAM_AUTHOR = "akismet-guaranteed-spam"
 
+# Skip all of these tests, without making any requests, when there's no Akismet
+# configuration to run them with.
+HAVE_CONFIG = bool(
+    os.getenv(_common._KEY_ENV_VAR, "") and os.getenv(_common._URL_ENV_VAR, "")
+)
+SKIP_MESSAGE = "Akismet API key and site URL are not configured."
 
+
+@unittest.skipUnless(HAVE_CONFIG, SKIP_MESSAGE)
 class SyncAkismetEndToEndTests(AkismetTests):
     """
     End-to-end tests of the synchronous Akismet API client.
@@ -30,12 +40,24 @@ class SyncAkismetEndToEndTests(AkismetTests):
 
     common_kwargs = {"user_ip": "127.0.0.1", "is_test": 1}
 
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         """
-        Create a default client instance for use in testing.
+        Create a default client instance, shared by all the tests in this class so
+        that they reuse its open connections.
+
+        """
+        super().setUpClass()
+        cls.client = akismet.SyncClient.validated_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Close the shared client instance.
 
         """
-        self.client = akismet.SyncClient.validated_client()
+        cls.client.close()
+        super().tearDownClass()
 
     def test_construct_config_valid(self):
         """
@@ -50,14 +72,11 @@ class SyncAkismetEndToEndTests(AkismetTests):
 
         """
 
-        try:
-            os.environ[_common._KEY_ENV_VAR] = BAD_KEY
-            os.environ[_common._URL_ENV_VAR] = BAD_URL
+        with self.patched_environ(
+            {_common._KEY_ENV_VAR: BAD_KEY, _common._URL_ENV_VAR: BAD_URL}
+        ):
             with self.assertRaises(akismet.APIKeyError):
                 akismet.SyncClient.validated_client()
-        finally:
-            os.environ[_common._KEY_ENV_VAR] = self.api_key
-            os.environ[_common._URL_ENV_VAR] = self.site_url
 
     def test_verify_key_valid(self):
         """
@@ -136,6 +155,7 @@ class SyncAkismetEndToEndTests(AkismetTests):
         )
 
 
+@unittest.skipUnless(HAVE_CONFIG, SKIP_MESSAGE)
 class AsyncAkismetEndToEndTests(AsyncAkismetTests):
     """
     End-to-end tests of the asynchronous Akismet API client.
@@ -151,6 +171,13 @@ class AsyncAkismetEndToEndTests(AsyncAkismetTests):
         """
         self.client = await akismet.AsyncClient.validated_client()
 
+    async def asyncTearDown(self):
+        """
+        Close the client instance before this test's event loop goes away.
+
+        """
+        await self.client.close()
+
     async def test_construct_config_valid(self):
         """
         With a valid configuration, constructing a client succeeds.
@@ -164,14 +191,11 @@ class AsyncAkismetEndToEndTests(AsyncAkismetTests):
 
         """
 
-        try:
-            os.environ[_common._KEY_ENV_VAR] = BAD_KEY
-            os.environ[_common._URL_ENV_VAR] = BAD_URL
+        with self.patched_environ(
+            {_common._KEY_ENV_VAR: BAD_KEY, _common._URL_ENV_VAR: BAD_URL}
+        ):
             with self.assertRaises(akismet.APIKeyError):
                 await akismet.AsyncClient.validated_client()
-        finally:
-            os.environ[_common._KEY_ENV_VAR] = self.api_key
-            os.environ[_common._URL_ENV_VAR] = self.site_url
 
     async def test_verify_key_valid(self):
         """
@@ -194,17 +218,20 @@ class AsyncAkismetEndToEndTests(AsyncAkismetTests):
         and/or site URL.
 
         """
-        client = akismet.AsyncClient(
-            config=self.config,
-        )
-        for method in ("comment_check", "submit_ham", "submit_spam"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.APIKeyError):
-                    await getattr(client, method)(**self.common_kwargs)
-        for method in ("key_sites", "usage_limit"):
+        post_methods = ("comment_check", "submit_ham", "submit_spam")
+        get_methods = ("key_sites", "usage_limit")
+        async with akismet.AsyncClient(config=self.config) as client:
+            results = await asyncio.gather(
+                *(
+                    getattr(client, method)(**self.common_kwargs)
+                    for method in post_methods
+                ),
+                *(getattr(client, method)() for method in get_methods),
+                return_exceptions=True,
+            )
+        for method, result in zip(post_methods + get_methods, results):
             with self.subTest(method=method):
-                with self.assertRaises(akismet.APIKeyError):
-                    await getattr(client, method)()
+                assert isinstance(result, akismet.APIKeyError)
 
     async def test_comment_check_spam(self):
         """
@@ -251,6 +278,7 @@ class AsyncAkismetEndToEndTests(AsyncAkismetTests):
         )
 
 
+@unittest.skipUnless(HAVE_CONFIG, SKIP_MESSAGE)
 class LegacyAkismetEndToEndTests(AkismetTests):
     """
     End-to-end tests of the legacy/deprecated Akismet API client.
@@ -259,12 +287,15 @@ class LegacyAkismetEndToEndTests(AkismetTests):
 
     common_kwargs = {"user_ip": "127.0.0.1", "user_agent": "Mozilla", "is_test": 1}
 
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         """
-        Create a default client instance for use in testing.
+        Create a default client instance, shared by all the tests in this class so
+        that they reuse its open connections.
 
         """
-        self.client = akismet.Akismet(key=self.api_key, blog_url=self.site_url)
+        super().setUpClass()
+        cls.client = akismet.Akismet(key=cls.api_key, blog_url=cls.site_url)
 
     def test_construct_config_valid(self):
         """
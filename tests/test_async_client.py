@@ -5,16 +5,18 @@ Tests for the asynchronous Akismet API client.
 
 # SPDX-License-Identifier: BSD-3-Clause
 
-import os
+import asyncio
 import textwrap
+import urllib.parse
 from http import HTTPStatus
+from unittest import mock
 
 import httpx
 
 import akismet
 from akismet import _common
 
-from .base import AsyncAkismetTests
+from .base import ERROR_STATUS_CODES, AsyncAkismetTests
 
 
 class AsyncAkismetConstructorTests(AsyncAkismetTests):
@@ -32,6 +34,34 @@ class AsyncAkismetConstructorTests(AsyncAkismetTests):
             http_client=self.custom_response_async_client()
         )
 
+    async def test_construct_config_valid_cached(self):
+        """
+        Once a configuration has been verified, constructing another client with it
+        does not verify it again.
+
+        """
+        await akismet.AsyncClient.validated_client(
+            http_client=self.custom_response_async_client()
+        )
+        await akismet.AsyncClient.validated_client(
+            http_client=self.custom_response_async_client(config_valid=False)
+        )
+
+    async def test_construct_config_valid_cache_expired(self):
+        """
+        Once a remembered verification has expired, constructing another client
+        verifies the configuration again.
+
+        """
+        await akismet.AsyncClient.validated_client(
+            http_client=self.custom_response_async_client()
+        )
+        with mock.patch.object(_common, "_VERIFICATION_TTL", 0):
+            with self.assertRaises(akismet.APIKeyError):
+                await akismet.AsyncClient.validated_client(
+                    http_client=self.custom_response_async_client(config_valid=False)
+                )
+
     async def test_construct_config_invalid_key(self):
         """
         With an invalid API key, constructing a client raises an APIKeyError.
@@ -47,12 +77,9 @@ class AsyncAkismetConstructorTests(AsyncAkismetTests):
         With an invalid URL, constructing a client raises a ConfigurationError.
 
         """
-        try:
-            os.environ[_common._URL_ENV_VAR] = "ftp://example.com"
+        with self.patched_environ({_common._URL_ENV_VAR: "ftp://example.com"}):
             with self.assertRaises(akismet.ConfigurationError):
                 await akismet.AsyncClient.validated_client()
-        finally:
-            os.environ[_common._URL_ENV_VAR] = self.site_url
 
     async def test_construct_config_missing_key(self):
         """
@@ -60,15 +87,11 @@ class AsyncAkismetConstructorTests(AsyncAkismetTests):
         ConfigurationError.
 
         """
-        try:
-            if _common._KEY_ENV_VAR in os.environ:
-                del os.environ[_common._KEY_ENV_VAR]
+        with self.patched_environ({_common._KEY_ENV_VAR: None}):
             with self.assertRaises(akismet.ConfigurationError):
                 await akismet.AsyncClient.validated_client(
                     http_client=self.custom_response_async_client()
                 )
-        finally:
-            os.environ[_common._KEY_ENV_VAR] = self.api_key
 
     async def test_construct_config_missing_url(self):
         """
@@ -76,15 +99,11 @@ class AsyncAkismetConstructorTests(AsyncAkismetTests):
         ConfigurationError.
 
         """
-        try:
-            if _common._URL_ENV_VAR in os.environ:
-                del os.environ[_common._URL_ENV_VAR]
+        with self.patched_environ({_common._URL_ENV_VAR: None}):
             with self.assertRaises(akismet.ConfigurationError):
                 await akismet.AsyncClient.validated_client(
                     http_client=self.custom_response_async_client()
                 )
-        finally:
-            os.environ[_common._URL_ENV_VAR] = self.site_url
 
     async def test_construct_config_missing_all(self):
         """
@@ -92,18 +111,13 @@ class AsyncAkismetConstructorTests(AsyncAkismetTests):
         ConfigurationError.
 
         """
-        try:
-            if _common._KEY_ENV_VAR in os.environ:
-                del os.environ[_common._KEY_ENV_VAR]
-            if _common._URL_ENV_VAR in os.environ:
-                del os.environ[_common._URL_ENV_VAR]
+        with self.patched_environ(
+            {_common._KEY_ENV_VAR: None, _common._URL_ENV_VAR: None}
+        ):
             with self.assertRaises(akismet.ConfigurationError):
                 await akismet.AsyncClient.validated_client(
                     http_client=self.custom_response_async_client()
                 )
-        finally:
-            os.environ[_common._KEY_ENV_VAR] = self.api_key
-            os.environ[_common._URL_ENV_VAR] = self.site_url
 
     async def test_construct_default_client(self):
         """
@@ -113,8 +127,29 @@ class AsyncAkismetConstructorTests(AsyncAkismetTests):
         """
         client = akismet.AsyncClient(config=self.config)
         http_client = client._http_client
-        assert "user-agent" in http_client.headers
-        assert http_client.headers["user-agent"] == _common.USER_AGENT
+        assert http_client.headers.get("user-agent") == _common.USER_AGENT
+
+    async def test_close(self):
+        """
+        Closing a client closes its HTTP client.
+
+        """
+        client = akismet.AsyncClient(
+            config=self.config, http_client=self.custom_response_async_client()
+        )
+        await client.close()
+        assert client._http_client.is_closed
+
+    async def test_context_manager(self):
+        """
+        Using a client as a context manager closes its HTTP client on exit.
+
+        """
+        async with akismet.AsyncClient(
+            config=self.config, http_client=self.custom_response_async_client()
+        ) as client:
+            assert await client.comment_check(**self.common_kwargs)
+        assert client._http_client.is_closed
 
 
 class AsyncAkismetAPITests(AsyncAkismetTests):
@@ -131,8 +166,9 @@ class AsyncAkismetAPITests(AsyncAkismetTests):
         """
         client = akismet.AsyncClient(
             config=self.config,
-            http_client=self.custom_response_sync_client(),
+            http_client=self.custom_response_async_client(),
         )
+        data = {"api_key": client._config.key}
         # The tested set of methods here are all the methods that are in Python 3.11's
         # http.HTTPMethod enum but not supported for Akismet requests.
         for bad_method in (
@@ -150,7 +186,7 @@ class AsyncAkismetAPITests(AsyncAkismetTests):
                         bad_method,
                         _common._API_V11,
                         _common._COMMENT_CHECK,
-                        {"api_key", client._config.key},
+                        data,
                     )
 
     async def test_verify_key_valid(self):
@@ -194,6 +230,21 @@ class AsyncAkismetAPITests(AsyncAkismetTests):
                 with self.assertRaises(akismet.APIKeyError):
                     await getattr(client, method)()
 
+    async def test_request_with_invalid_key_forgets_verification(self):
+        """
+        When Akismet reports the API key/URL as invalid, any remembered verification
+        of the configuration is discarded.
+
+        """
+        _common._mark_verified(self.config)
+        client = akismet.AsyncClient(
+            config=self.config,
+            http_client=self.custom_response_async_client(response_text="invalid"),
+        )
+        with self.assertRaises(akismet.APIKeyError):
+            await client.comment_check(**self.common_kwargs)
+        assert not _common._is_verified(self.config)
+
     async def test_comment_check_spam(self):
         """
         ``comment_check()`` returns the SPAM value when Akismet declares the content
@@ -241,6 +292,57 @@ class AsyncAkismetAPITests(AsyncAkismetTests):
             == akismet.CheckResponse.HAM
         )
 
+    async def test_comment_check_many(self):
+        """
+        ``comment_check_many()`` returns one check result per item, in order.
+
+        """
+
+        def _handler(request: httpx.Request) -> httpx.Response:
+            """
+            Mock transport handler which declares content with an odd index to be
+            spam, and everything else ham.
+
+            """
+            data = urllib.parse.parse_qs(request.content.decode())
+            index = int(data["comment_content"][0].split()[-1])
+            return httpx.Response(
+                HTTPStatus.OK, content="true" if index % 2 else "false"
+            )
+
+        client = akismet.AsyncClient(
+            config=self.config,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(_handler)),
+        )
+        items = [
+            {"comment_content": f"test {i}", **self.common_kwargs} for i in range(6)
+        ]
+        assert (
+            await client.comment_check_many(items, max_concurrency=2)
+            == [
+                akismet.CheckResponse.HAM,
+                akismet.CheckResponse.SPAM,
+            ]
+            * 3
+        )
+
+    async def test_comment_check_many_bad_concurrency(self):
+        """
+        ``comment_check_many()`` raises ValueError when ``max_concurrency`` is less
+        than 1.
+
+        """
+        client = akismet.AsyncClient(
+            config=self.config,
+            http_client=self.custom_response_async_client(),
+        )
+        for max_concurrency in (0, -1):
+            with self.subTest(max_concurrency=max_concurrency):
+                with self.assertRaises(ValueError):
+                    await client.comment_check_many(
+                        [self.common_kwargs], max_concurrency=max_concurrency
+                    )
+
     async def test_submit_ham(self):
         """
         ``submit_ham()`` returns True when Akismet accepts the submission.
@@ -267,6 +369,40 @@ class AsyncAkismetAPITests(AsyncAkismetTests):
         )
         assert await client.submit_spam(**self.common_kwargs)
 
+    async def test_submit_ham_spam_many(self):
+        """
+        ``submit_ham_many()`` and ``submit_spam_many()`` submit every item, and return
+        one True per item when Akismet accepts the submissions.
+
+        """
+        submitted = []
+
+        def _handler(request: httpx.Request) -> httpx.Response:
+            """
+            Mock transport handler which records the submitted content and accepts
+            the submission.
+
+            """
+            data = urllib.parse.parse_qs(request.content.decode())
+            submitted.append(data["comment_content"][0])
+            return httpx.Response(HTTPStatus.OK, content=_common._SUBMISSION_RESPONSE)
+
+        client = akismet.AsyncClient(
+            config=self.config,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(_handler)),
+        )
+        items = [
+            {"comment_content": f"test {i}", **self.common_kwargs} for i in range(5)
+        ]
+        for method in (client.submit_ham_many, client.submit_spam_many):
+            with self.subTest(method=method.__name__):
+                submitted.clear()
+                assert await method(items, max_concurrency=2) == [True] * len(items)
+                assert sorted(submitted) == [item["comment_content"] for item in items]
+            with self.subTest(method=method.__name__, max_concurrency=0):
+                with self.assertRaises(ValueError):
+                    await method(items, max_concurrency=0)
+
     async def test_key_sites_json(self):
         """
         ``key_sites()`` returns key usage information in JSON format by async default.
@@ -304,6 +440,33 @@ class AsyncAkismetAPITests(AsyncAkismetTests):
         )
         assert await client.key_sites() == response_json
 
+    async def test_key_sites_params(self):
+        """
+        ``key_sites()`` sends only the arguments it was given, under Akismet's
+        parameter names.
+
+        """
+        requests = []
+
+        def _handler(request: httpx.Request) -> httpx.Response:
+            """
+            Mock transport handler which records the request.
+
+            """
+            requests.append(request)
+            return httpx.Response(HTTPStatus.OK, json={})
+
+        client = akismet.AsyncClient(
+            config=self.config,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(_handler)),
+        )
+        await client.key_sites(month="2022-09", url_filter="example.com", limit=10)
+        assert dict(requests[0].url.params) == {
+            "month": "2022-09",
+            "filter": "example.com",
+            "limit": "10",
+        }
+
     async def test_key_sites_csv(self):
         """
         ``key_sites()`` returns key usage information in CSV format when requested.
@@ -351,29 +514,38 @@ class AsyncAkismetErrorTests(AsyncAkismetTests):
 
     """
 
+    async def _assert_all_methods_raise(self, client, exception_class, **params):
+        """
+        Assert that every API method of ``client`` raises ``exception_class``, with
+        each method reported as its own subtest (labelled with any extra ``params``).
+
+        """
+        with self.subTest(method="verify_key", **params):
+            with self.assertRaises(exception_class):
+                await client.verify_key(self.config.key, self.config.url)
+        for method in ("comment_check", "submit_ham", "submit_spam"):
+            with self.subTest(method=method, **params):
+                with self.assertRaises(exception_class):
+                    await getattr(client, method)(**self.common_kwargs)
+        for method in ("key_sites", "usage_limit"):
+            with self.subTest(method=method, **params):
+                with self.assertRaises(exception_class):
+                    await getattr(client, method)()
+
     async def test_error_status(self):
         """
         RequestError is raised when a POST request to Akismet responds with an HTTP
         status code indicating an error.
 
         """
-        codes = [code for code in HTTPStatus if 400 <= code <= 599]
-        for code in codes:
+        for code in ERROR_STATUS_CODES:
             client = akismet.AsyncClient(
                 config=self.config,
                 http_client=self.custom_response_async_client(status_code=code),
             )
-        with self.subTest(method="verify_key"):
-            with self.assertRaises(akismet.RequestError):
-                await client.verify_key(self.config.key, self.config.url)
-        for method in ("comment_check", "submit_ham", "submit_spam"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    await getattr(client, method)(**self.common_kwargs)
-        for method in ("key_sites", "usage_limit"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    await getattr(client, method)()
+            await self._assert_all_methods_raise(
+                client, akismet.RequestError, status=code
+            )
 
     async def test_error_timeout(self):
         """
@@ -387,17 +559,7 @@ class AsyncAkismetErrorTests(AsyncAkismetTests):
                 httpx.TimeoutException, "Timed out."
             ),
         )
-        with self.subTest(method="verify_key"):
-            with self.assertRaises(akismet.RequestError):
-                await client.verify_key(self.config.key, self.config.url)
-        for method in ("comment_check", "submit_ham", "submit_spam"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    await getattr(client, method)(**self.common_kwargs)
-        for method in ("key_sites", "usage_limit"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    await getattr(client, method)()
+        await self._assert_all_methods_raise(client, akismet.RequestError)
 
     async def test_error_other_httpx(self):
         """
@@ -408,39 +570,19 @@ class AsyncAkismetErrorTests(AsyncAkismetTests):
             config=self.config,
             http_client=self.exception_async_client(httpx.RequestError),
         )
-        with self.subTest(method="verify_key"):
-            with self.assertRaises(akismet.RequestError):
-                await client.verify_key(self.config.key, self.config.url)
-        for method in ("comment_check", "submit_ham", "submit_spam"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    await getattr(client, method)(**self.common_kwargs)
-        for method in ("key_sites", "usage_limit"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    await getattr(client, method)()
+        await self._assert_all_methods_raise(client, akismet.RequestError)
 
     async def test_error_other(self):
         """
-        RequestError is raised when any other (non-``httpx``) exception occurs during
-        the request.
+        Any other (non-``httpx``) exception raised during the request propagates
+        unchanged, rather than being reported as a RequestError.
 
         """
         client = akismet.AsyncClient(
             config=self.config,
             http_client=self.exception_async_client(TypeError),
         )
-        with self.subTest(method="verify_key"):
-            with self.assertRaises(akismet.RequestError):
-                await client.verify_key(self.config.key, self.config.url)
-        for method in ("comment_check", "submit_ham", "submit_spam"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    await getattr(client, method)(**self.common_kwargs)
-        for method in ("key_sites", "usage_limit"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    await getattr(client, method)()
+        await self._assert_all_methods_raise(client, TypeError)
 
     async def test_unknown_argument(self):
         """
@@ -453,7 +595,9 @@ class AsyncAkismetErrorTests(AsyncAkismetTests):
         )
         for method in ("comment_check", "submit_ham", "submit_spam"):
             with self.subTest(method=method):
-                with self.assertRaises(akismet.UnknownArgumentError):
+                with self.assertRaisesRegex(
+                    akismet.UnknownArgumentError, ": bad_argument"
+                ):
                     await getattr(client, method)(bad_argument=1, **self.common_kwargs)
 
     async def test_protocol_error_comment_check(self):
@@ -469,6 +613,51 @@ class AsyncAkismetErrorTests(AsyncAkismetTests):
         with self.assertRaises(akismet.ProtocolError):
             await client.comment_check(**self.common_kwargs)
 
+    async def test_protocol_error_comment_check_many(self):
+        """
+        ProtocolError is raised when ``comment_check_many()`` receives an unexpected
+        response.
+
+        """
+        client = akismet.AsyncClient(
+            config=self.config,
+            http_client=self.custom_response_async_client(response_text="bad"),
+        )
+        with self.assertRaises(akismet.ProtocolError):
+            await client.comment_check_many([self.common_kwargs, self.common_kwargs])
+
+    async def test_call_many_error_cancels_pending(self):
+        """
+        When one call made by the batch methods fails, the calls still in flight are
+        cancelled before the error propagates.
+
+        """
+        client = akismet.AsyncClient(
+            config=self.config, http_client=self.custom_response_async_client()
+        )
+        never_set = asyncio.Event()
+        cancelled = []
+
+        async def _handler(fail: bool):
+            """
+            Stand-in for a client method which either fails immediately or waits
+            until it is cancelled.
+
+            """
+            if fail:
+                raise akismet.ProtocolError("failed")
+            try:
+                await never_set.wait()
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        with self.assertRaises(akismet.ProtocolError):
+            await client._call_many(
+                _handler, [{"fail": False}, {"fail": True}], max_concurrency=2
+            )
+        assert cancelled == [True]
+
     async def test_protocol_error_submit_ham_spam(self):
         """
         ProtocolError is raised when ``submit_ham()`` or ``submit_spam()`` receive an
@@ -489,19 +678,11 @@ class AsyncAkismetErrorTests(AsyncAkismetTests):
         ProtocolError is raised when ``verify_key()`` receives an unexpected response.
 
         """
-
-        def _handler(  # pylint: disable=unused-argument
-            request: httpx.Request,
-        ) -> httpx.Response:
-            """
-            Mock transport handler which returns a controlled response.
-
-            """
-            return httpx.Response(status_code=HTTPStatus.OK, content="bad")
-
         client = akismet.AsyncClient(
             config=self.config,
-            http_client=httpx.AsyncClient(transport=httpx.MockTransport(_handler)),
+            http_client=httpx.AsyncClient(
+                transport=self.fixed_response_transport("bad")
+            ),
         )
         with self.assertRaises(akismet.ProtocolError):
             await client.verify_key(self.config.key, self.config.url)
@@ -5,13 +5,12 @@ Tests for the deprectaed legacy Akismet API client.
 
 # SPDX-License-Identifier: BSD-3-Clause
 
-import os
-from http import HTTPStatus
+from unittest import mock
 
 import httpx
 
 import akismet
-from akismet import _common
+from akismet import _common, _legacy_client
 
 from . import base
 
@@ -40,6 +39,23 @@ class LegacyAkismetConfigurationTests(base.AkismetTests):
         self.assertEqual(self.api_key, api.api_key)
         self.assertEqual(self.site_url, api.blog_url)
 
+    def test_config_verification_cached(self):
+        """
+        Once a configuration has been verified, configuring another instance with it
+        does not verify it again.
+
+        """
+        akismet.Akismet(
+            key=self.api_key,
+            blog_url=self.site_url,
+            http_client=self.custom_response_sync_client(),
+        )
+        akismet.Akismet(
+            key=self.api_key,
+            blog_url=self.site_url,
+            http_client=self.custom_response_sync_client(config_valid=False),
+        )
+
     def test_bad_config_args(self):
         """
         Configuring with bad arguments fails.
@@ -74,45 +90,35 @@ class LegacyAkismetConfigurationTests(base.AkismetTests):
         Configuring with bad environment variables fails.
 
         """
-        try:
-            os.environ[_common._KEY_ENV_VAR] = "invalid"
-            os.environ[_common._URL_ENV_VAR] = "http://invalid"
+        with self.patched_environ(
+            {_common._KEY_ENV_VAR: "invalid", _common._URL_ENV_VAR: "http://invalid"}
+        ):
             with self.assertRaises(akismet.APIKeyError):
                 akismet.Akismet(
                     http_client=self.custom_response_sync_client(config_valid=False)
                 )
-        finally:
-            os.environ[_common._KEY_ENV_VAR] = self.api_key
-            os.environ[_common._URL_ENV_VAR] = self.site_url
 
     def test_bad_config_missing_key(self):
         """
         Configuring with missing key fails.
 
         """
-        try:
-            del os.environ[_common._KEY_ENV_VAR]
+        with self.patched_environ({_common._KEY_ENV_VAR: None}):
             with self.assertRaises(akismet.ConfigurationError):
                 akismet.Akismet(
                     http_client=self.custom_response_sync_client(config_valid=False)
                 )
-        finally:
-            os.environ[_common._KEY_ENV_VAR] = self.api_key
-            os.environ[_common._URL_ENV_VAR] = self.site_url
 
     def test_bad_config_missing_url(self):
         """
         Configuring with missing URL fails.
 
         """
-        try:
-            del os.environ[_common._URL_ENV_VAR]
+        with self.patched_environ({_common._URL_ENV_VAR: None}):
             with self.assertRaises(akismet.ConfigurationError):
                 akismet.Akismet(
                     http_client=self.custom_response_sync_client(config_valid=False)
                 )
-        finally:
-            os.environ[_common._URL_ENV_VAR] = self.site_url
 
     def test_bad_url(self):
         """
@@ -126,13 +132,13 @@ class LegacyAkismetConfigurationTests(base.AkismetTests):
             "http//example.com",
             "https//example.com",
         )
+        http_client = self.custom_response_sync_client(config_valid=False)
         for url in bad_urls:
-            with self.assertRaises(akismet.ConfigurationError):
-                akismet.Akismet(
-                    key=self.api_key,
-                    blog_url=url,
-                    http_client=self.custom_response_sync_client(config_valid=False),
-                )
+            with self.subTest(url=url):
+                with self.assertRaises(akismet.ConfigurationError):
+                    akismet.Akismet(
+                        key=self.api_key, blog_url=url, http_client=http_client
+                    )
 
     def test_missing_config(self):
         """
@@ -155,12 +161,9 @@ class LegacyAkismetConfigurationTests(base.AkismetTests):
         The Akismet class creates the correct user-agent string.
 
         """
-        api = akismet.Akismet(
-            key=self.api_key,
-            blog_url=self.site_url,
-            http_client=self.custom_response_sync_client(),
+        self.assertEqual(
+            akismet.Akismet.user_agent_header["User-Agent"], _common.USER_AGENT
         )
-        self.assertEqual(api.user_agent_header["User-Agent"], _common.USER_AGENT)
 
 
 class LegacyAkismetAPITests(base.AkismetTests):
@@ -200,6 +203,44 @@ class LegacyAkismetAPITests(base.AkismetTests):
             )
         )
 
+    def test_default_http_client_shared(self):
+        """
+        Instances and verify_key() calls which aren't given an HTTP client share a
+        single default one, created on first use.
+
+        """
+        http_client = self.custom_response_sync_client()
+        with mock.patch.object(
+            _legacy_client, "_SHARED_SYNC_CLIENT", None
+        ), mock.patch.object(
+            _common, "_get_sync_http_client", return_value=http_client
+        ) as factory:
+            first = akismet.Akismet(key=self.api_key, blog_url=self.site_url)
+            second = akismet.Akismet(key=self.api_key, blog_url=self.site_url)
+            self.assertTrue(akismet.Akismet.verify_key(self.api_key, self.site_url))
+        self.assertIs(first.http_client, http_client)
+        self.assertIs(second.http_client, http_client)
+        factory.assert_called_once_with()
+
+    def test_default_http_client_recreated_when_closed(self):
+        """
+        If the shared default HTTP client has been closed, instances and verify_key()
+        calls created afterward get a new one.
+
+        """
+        closed_client = self.custom_response_sync_client()
+        closed_client.close()
+        http_client = self.custom_response_sync_client()
+        with mock.patch.object(
+            _legacy_client, "_SHARED_SYNC_CLIENT", closed_client
+        ), mock.patch.object(
+            _common, "_get_sync_http_client", return_value=http_client
+        ) as factory:
+            api = akismet.Akismet(key=self.api_key, blog_url=self.site_url)
+            self.assertTrue(akismet.Akismet.verify_key(self.api_key, self.site_url))
+        self.assertIs(api.http_client, http_client)
+        factory.assert_called_once_with()
+
     def test_comment_check_spam(self):
         """
         The comment_check method correctly identifies spam.
@@ -267,21 +308,49 @@ class LegacyAkismetAPITests(base.AkismetTests):
         )
         self.assertTrue(api.submit_ham(**ham_kwargs))
 
-    def test_unexpected_verify_key_response(self):
+    def test_submission_url_override(self):
         """
-        Unexpected verify_key API responses are correctly handled.
+        A subclass which overrides the submission URLs has its submissions sent to
+        those URLs.
 
         """
+        urls = []
 
-        def _handler(  # pylint: disable=unused-argument
-            request: httpx.Request,
-        ) -> httpx.Response:
+        def _handler(request: httpx.Request) -> httpx.Response:
             """
-            Mock transport handler which returns a controlled response.
+            Mock transport handler which records the request URL and accepts the
+            verification or submission.
 
             """
-            return httpx.Response(status_code=HTTPStatus.OK, content="bad")
+            if request.url == self.verify_key_url:
+                return httpx.Response(200, content=b"valid")
+            urls.append(str(request.url))
+            return httpx.Response(200, content=_common._SUBMISSION_RESPONSE)
 
+        class ProxiedAkismet(akismet.Akismet):
+            """
+            Legacy client which submits through a proxy.
+
+            """
+
+            SUBMIT_HAM_URL = "https://proxy.example/submit-ham"
+            SUBMIT_SPAM_URL = "https://proxy.example/submit-spam"
+
+        api = ProxiedAkismet(
+            http_client=httpx.Client(transport=httpx.MockTransport(_handler))
+        )
+        self.assertTrue(api.submit_ham(**self.base_kwargs))
+        self.assertTrue(api.submit_spam(**self.base_kwargs))
+        self.assertEqual(
+            urls,
+            ["https://proxy.example/submit-ham", "https://proxy.example/submit-spam"],
+        )
+
+    def test_unexpected_verify_key_response(self):
+        """
+        Unexpected verify_key API responses are correctly handled.
+
+        """
         api = akismet.Akismet(
             http_client=self.custom_response_sync_client(),
         )
@@ -289,7 +358,9 @@ class LegacyAkismetAPITests(base.AkismetTests):
             api.verify_key(
                 self.api_key,
                 self.site_url,
-                http_client=httpx.Client(transport=httpx.MockTransport(_handler)),
+                http_client=httpx.Client(
+                    transport=self.fixed_response_transport("bad")
+                ),
             )
 
     def test_unexpected_comment_check_response(self):
@@ -348,5 +419,26 @@ class LegacyAkismetAPITests(base.AkismetTests):
         api = akismet.Akismet(
             http_client=self.custom_response_sync_client(),
         )
-        with self.assertRaises(akismet.UnknownArgumentError):
+        with self.assertRaisesRegex(akismet.UnknownArgumentError, "bad_arg"):
             api.comment_check(**bad_kwargs)
+
+    def test_optional_keys_override(self):
+        """
+        A subclass which extends ``OPTIONAL_KEYS`` may pass the additional arguments.
+
+        """
+
+        class HoneypotAkismet(akismet.Akismet):
+            """
+            Legacy client which also accepts a honeypot field name.
+
+            """
+
+            OPTIONAL_KEYS = akismet.Akismet.OPTIONAL_KEYS + ["honeypot_field_name"]
+
+        api = HoneypotAkismet(
+            http_client=self.custom_response_sync_client(response_text="false"),
+        )
+        self.assertFalse(
+            api.comment_check(honeypot_field_name="hidden", **self.base_kwargs)
+        )
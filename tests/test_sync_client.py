@@ -5,16 +5,18 @@ Tests for the synchronous Akismet API client.
 
 # SPDX-License-Identifier: BSD-3-Clause
 
-import os
 import textwrap
+import threading
+import urllib.parse
 from http import HTTPStatus
+from unittest import mock
 
 import httpx
 
 import akismet
 from akismet import _common
 
-from .base import AkismetTests
+from .base import ERROR_STATUS_CODES, AkismetTests
 
 
 class SyncAkismetConstructorTests(AkismetTests):
@@ -32,6 +34,123 @@ class SyncAkismetConstructorTests(AkismetTests):
             http_client=self.custom_response_sync_client()
         )
 
+    def test_construct_config_valid_cached(self):
+        """
+        Once a configuration has been verified, constructing another client with it
+        does not verify it again.
+
+        """
+        akismet.SyncClient.validated_client(
+            http_client=self.custom_response_sync_client()
+        )
+        akismet.SyncClient.validated_client(
+            http_client=self.custom_response_sync_client(config_valid=False)
+        )
+
+    def test_construct_config_valid_cache_expired(self):
+        """
+        Once a remembered verification has expired, constructing another client
+        verifies the configuration again.
+
+        """
+        akismet.SyncClient.validated_client(
+            http_client=self.custom_response_sync_client()
+        )
+        with mock.patch.object(_common, "_VERIFICATION_TTL", 0):
+            with self.assertRaises(akismet.APIKeyError):
+                akismet.SyncClient.validated_client(
+                    http_client=self.custom_response_sync_client(config_valid=False)
+                )
+
+    def test_verification_cache_prunes_expired(self):
+        """
+        Recording a verification discards remembered verifications which have
+        expired.
+
+        """
+        other = akismet.Config(key="other-key", url="http://other.example.com")
+        _common._mark_verified(other)
+        with mock.patch.object(_common, "_VERIFICATION_TTL", 0):
+            _common._mark_verified(self.config)
+        assert list(_common._VERIFIED_CONFIGS) == [self.config]
+
+    def test_clear_verify_cache(self):
+        """
+        After ``clear_verify_cache()``, constructing a client verifies the
+        configuration again.
+
+        """
+        akismet.SyncClient.validated_client(
+            http_client=self.custom_response_sync_client()
+        )
+        akismet.clear_verify_cache()
+        with self.assertRaises(akismet.APIKeyError):
+            akismet.SyncClient.validated_client(
+                http_client=self.custom_response_sync_client(config_valid=False)
+            )
+
+    def test_verification_cache_bounded(self):
+        """
+        The number of remembered verifications is bounded, and the least recently
+        verified configurations are evicted first.
+
+        """
+        configs = [
+            akismet.Config(key=f"key-{i}", url=f"http://{i}.example.com")
+            for i in range(3)
+        ]
+        with mock.patch.object(_common, "_VERIFIED_CONFIGS_MAXSIZE", 2):
+            for config in configs:
+                _common._mark_verified(config)
+            assert list(_common._VERIFIED_CONFIGS) == configs[1:]
+            _common._mark_verified(configs[1])
+            _common._mark_verified(configs[0])
+            assert list(_common._VERIFIED_CONFIGS) == [configs[1], configs[0]]
+
+    def test_verification_cache_threadsafe(self):
+        """
+        Another thread changing the cache while a verification is being recorded
+        doesn't break the recording.
+
+        """
+        configs = [
+            akismet.Config(key=f"key-{i}", url=f"http://{i}.example.com")
+            for i in range(3)
+        ]
+        threads = []
+
+        class _InterleavedDict(dict):
+            """
+            Dict which, the first time it's iterated, has another thread forget the
+            oldest entry before the iteration proceeds.
+
+            """
+
+            def __iter__(self):
+                iterator = super().__iter__()
+                if not threads:
+                    thread = threading.Thread(
+                        target=_common._forget_verified, args=(configs[0],)
+                    )
+                    threads.append(thread)
+                    thread.start()
+                    # Give the other thread the chance to interfere; it won't finish
+                    # while the cache is locked.
+                    thread.join(timeout=0.1)
+                return iterator
+
+        with mock.patch.object(_common, "_VERIFIED_CONFIGS_MAXSIZE", 2):
+            _common._mark_verified(configs[0])
+            _common._mark_verified(configs[1])
+            with mock.patch.object(
+                _common,
+                "_VERIFIED_CONFIGS",
+                _InterleavedDict(_common._VERIFIED_CONFIGS),
+            ):
+                _common._mark_verified(configs[2])
+                threads[0].join()
+                assert list(_common._VERIFIED_CONFIGS) == configs[1:]
+
     def test_construct_config_invalid_key(self):
         """
         With an invalid API key, constructing a client raises an APIKeyError.
@@ -47,12 +166,9 @@ class SyncAkismetConstructorTests(AkismetTests):
         With an invalid URL, constructing a client raises a ConfigurationError.
 
         """
-        try:
-            os.environ[_common._URL_ENV_VAR] = "ftp://example.com"
+        with self.patched_environ({_common._URL_ENV_VAR: "ftp://example.com"}):
             with self.assertRaises(akismet.ConfigurationError):
                 akismet.SyncClient.validated_client()
-        finally:
-            os.environ[_common._URL_ENV_VAR] = self.site_url
 
     def test_construct_config_missing_key(self):
         """
@@ -60,15 +176,11 @@ class SyncAkismetConstructorTests(AkismetTests):
         ConfigurationError.
 
         """
-        try:
-            if _common._KEY_ENV_VAR in os.environ:
-                del os.environ[_common._KEY_ENV_VAR]
+        with self.patched_environ({_common._KEY_ENV_VAR: None}):
             with self.assertRaises(akismet.ConfigurationError):
                 akismet.SyncClient.validated_client(
                     http_client=self.custom_response_sync_client()
                 )
-        finally:
-            os.environ[_common._KEY_ENV_VAR] = self.api_key
 
     def test_construct_config_missing_url(self):
         """
@@ -76,15 +188,11 @@ class SyncAkismetConstructorTests(AkismetTests):
         ConfigurationError.
 
         """
-        try:
-            if _common._URL_ENV_VAR in os.environ:
-                del os.environ[_common._URL_ENV_VAR]
+        with self.patched_environ({_common._URL_ENV_VAR: None}):
             with self.assertRaises(akismet.ConfigurationError):
                 akismet.SyncClient.validated_client(
                     http_client=self.custom_response_sync_client()
                 )
-        finally:
-            os.environ[_common._URL_ENV_VAR] = self.site_url
 
     def test_construct_config_missing_all(self):
         """
@@ -92,18 +200,13 @@ class SyncAkismetConstructorTests(AkismetTests):
         ConfigurationError.
 
         """
-        try:
-            if _common._KEY_ENV_VAR in os.environ:
-                del os.environ[_common._KEY_ENV_VAR]
-            if _common._URL_ENV_VAR in os.environ:
-                del os.environ[_common._URL_ENV_VAR]
+        with self.patched_environ(
+            {_common._KEY_ENV_VAR: None, _common._URL_ENV_VAR: None}
+        ):
             with self.assertRaises(akismet.ConfigurationError):
                 akismet.SyncClient.validated_client(
                     http_client=self.custom_response_sync_client()
                 )
-        finally:
-            os.environ[_common._KEY_ENV_VAR] = self.api_key
-            os.environ[_common._URL_ENV_VAR] = self.site_url
 
     def test_construct_default_client(self):
         """
@@ -113,8 +216,29 @@ class SyncAkismetConstructorTests(AkismetTests):
         """
         client = akismet.SyncClient(config=self.config)
         http_client = client._http_client
-        assert "user-agent" in http_client.headers
-        assert http_client.headers["user-agent"] == _common.USER_AGENT
+        assert http_client.headers.get("user-agent") == _common.USER_AGENT
+
+    def test_close(self):
+        """
+        Closing a client closes its HTTP client.
+
+        """
+        client = akismet.SyncClient(
+            config=self.config, http_client=self.custom_response_sync_client()
+        )
+        client.close()
+        assert client._http_client.is_closed
+
+    def test_context_manager(self):
+        """
+        Using a client as a context manager closes its HTTP client on exit.
+
+        """
+        with akismet.SyncClient(
+            config=self.config, http_client=self.custom_response_sync_client()
+        ) as client:
+            assert client.comment_check(**self.common_kwargs)
+        assert client._http_client.is_closed
 
 
 class SyncAkismetAPITests(AkismetTests):
@@ -133,6 +257,7 @@ class SyncAkismetAPITests(AkismetTests):
             config=self.config,
             http_client=self.custom_response_sync_client(),
         )
+        data = {"api_key": client._config.key}
         # The tested set of methods here are all the methods that are in Python 3.11's
         # http.HTTPMethod enum but not supported for Akismet requests.
         for bad_method in (
@@ -150,7 +275,7 @@ class SyncAkismetAPITests(AkismetTests):
                         bad_method,
                         _common._API_V11,
                         _common._COMMENT_CHECK,
-                        {"api_key", client._config.key},
+                        data,
                     )
 
     def test_verify_key_valid(self):
@@ -194,6 +319,21 @@ class SyncAkismetAPITests(AkismetTests):
                 with self.assertRaises(akismet.APIKeyError):
                     getattr(client, method)()
 
+    def test_request_with_invalid_key_forgets_verification(self):
+        """
+        When Akismet reports the API key/URL as invalid, any remembered verification
+        of the configuration is discarded.
+
+        """
+        _common._mark_verified(self.config)
+        client = akismet.SyncClient(
+            config=self.config,
+            http_client=self.custom_response_sync_client(response_text="invalid"),
+        )
+        with self.assertRaises(akismet.APIKeyError):
+            client.comment_check(**self.common_kwargs)
+        assert not _common._is_verified(self.config)
+
     def test_comment_check_spam(self):
         """
         ``comment_check()`` returns the SPAM value when Akismet declares the content
@@ -241,6 +381,57 @@ class SyncAkismetAPITests(AkismetTests):
             == akismet.CheckResponse.HAM
         )
 
+    def test_comment_check_many(self):
+        """
+        ``comment_check_many()`` returns one check result per item, in order.
+
+        """
+
+        def _handler(request: httpx.Request) -> httpx.Response:
+            """
+            Mock transport handler which declares content with an odd index to be
+            spam, and everything else ham.
+
+            """
+            data = urllib.parse.parse_qs(request.content.decode())
+            index = int(data["comment_content"][0].split()[-1])
+            return httpx.Response(
+                HTTPStatus.OK, content="true" if index % 2 else "false"
+            )
+
+        client = akismet.SyncClient(
+            config=self.config,
+            http_client=httpx.Client(transport=httpx.MockTransport(_handler)),
+        )
+        items = [
+            {"comment_content": f"test {i}", **self.common_kwargs} for i in range(6)
+        ]
+        assert (
+            client.comment_check_many(items, max_concurrency=2)
+            == [
+                akismet.CheckResponse.HAM,
+                akismet.CheckResponse.SPAM,
+            ]
+            * 3
+        )
+
+    def test_comment_check_many_bad_concurrency(self):
+        """
+        ``comment_check_many()`` raises ValueError when ``max_concurrency`` is less
+        than 1.
+
+        """
+        client = akismet.SyncClient(
+            config=self.config,
+            http_client=self.custom_response_sync_client(),
+        )
+        for max_concurrency in (0, -1):
+            with self.subTest(max_concurrency=max_concurrency):
+                with self.assertRaises(ValueError):
+                    client.comment_check_many(
+                        [self.common_kwargs], max_concurrency=max_concurrency
+                    )
+
     def test_submit_ham(self):
         """
         ``submit_ham()`` returns True when Akismet accepts the submission.
@@ -267,6 +458,40 @@ class SyncAkismetAPITests(AkismetTests):
         )
         assert client.submit_spam(**self.common_kwargs)
 
+    def test_submit_ham_spam_many(self):
+        """
+        ``submit_ham_many()`` and ``submit_spam_many()`` submit every item, and return
+        one True per item when Akismet accepts the submissions.
+
+        """
+        submitted = []
+
+        def _handler(request: httpx.Request) -> httpx.Response:
+            """
+            Mock transport handler which records the submitted content and accepts
+            the submission.
+
+            """
+            data = urllib.parse.parse_qs(request.content.decode())
+            submitted.append(data["comment_content"][0])
+            return httpx.Response(HTTPStatus.OK, content=_common._SUBMISSION_RESPONSE)
+
+        client = akismet.SyncClient(
+            config=self.config,
+            http_client=httpx.Client(transport=httpx.MockTransport(_handler)),
+        )
+        items = [
+            {"comment_content": f"test {i}", **self.common_kwargs} for i in range(5)
+        ]
+        for method in (client.submit_ham_many, client.submit_spam_many):
+            with self.subTest(method=method.__name__):
+                submitted.clear()
+                assert method(items, max_concurrency=2) == [True] * len(items)
+                assert sorted(submitted) == [item["comment_content"] for item in items]
+            with self.subTest(method=method.__name__, max_concurrency=0):
+                with self.assertRaises(ValueError):
+                    method(items, max_concurrency=0)
+
     def test_key_sites_json(self):
         """
         ``key_sites()`` returns key usage information in JSON format by default.
@@ -304,6 +529,33 @@ class SyncAkismetAPITests(AkismetTests):
         )
         assert client.key_sites() == response_json
 
+    def test_key_sites_params(self):
+        """
+        ``key_sites()`` sends only the arguments it was given, under Akismet's
+        parameter names.
+
+        """
+        requests = []
+
+        def _handler(request: httpx.Request) -> httpx.Response:
+            """
+            Mock transport handler which records the request.
+
+            """
+            requests.append(request)
+            return httpx.Response(HTTPStatus.OK, json={})
+
+        client = akismet.SyncClient(
+            config=self.config,
+            http_client=httpx.Client(transport=httpx.MockTransport(_handler)),
+        )
+        client.key_sites(month="2022-09", url_filter="example.com", limit=10)
+        assert dict(requests[0].url.params) == {
+            "month": "2022-09",
+            "filter": "example.com",
+            "limit": "10",
+        }
+
     def test_key_sites_csv(self):
         """
         ``key_sites()`` returns key usage information in CSV format when requested.
@@ -351,29 +603,36 @@ class SyncAkismetErrorTests(AkismetTests):
 
     """
 
+    def _assert_all_methods_raise(self, client, exception_class, **params):
+        """
+        Assert that every API method of ``client`` raises ``exception_class``, with
+        each method reported as its own subtest (labelled with any extra ``params``).
+
+        """
+        with self.subTest(method="verify_key", **params):
+            with self.assertRaises(exception_class):
+                client.verify_key(self.config.key, self.config.url)
+        for method in ("comment_check", "submit_ham", "submit_spam"):
+            with self.subTest(method=method, **params):
+                with self.assertRaises(exception_class):
+                    getattr(client, method)(**self.common_kwargs)
+        for method in ("key_sites", "usage_limit"):
+            with self.subTest(method=method, **params):
+                with self.assertRaises(exception_class):
+                    getattr(client, method)()
+
     def test_error_status(self):
         """
         RequestError is raised when a POST request to Akismet responds with an HTTP
         status code indicating an error.
 
         """
-        codes = [code for code in HTTPStatus if 400 <= code <= 599]
-        for code in codes:
+        for code in ERROR_STATUS_CODES:
             client = akismet.SyncClient(
                 config=self.config,
                 http_client=self.custom_response_sync_client(status_code=code),
             )
-        with self.subTest(method="verify_key"):
-            with self.assertRaises(akismet.RequestError):
-                client.verify_key(self.config.key, self.config.url)
-        for method in ("comment_check", "submit_ham", "submit_spam"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    getattr(client, method)(**self.common_kwargs)
-        for method in ("key_sites", "usage_limit"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    getattr(client, method)()
+            self._assert_all_methods_raise(client, akismet.RequestError, status=code)
 
     def test_error_timeout(self):
         """
@@ -387,17 +646,7 @@ class SyncAkismetErrorTests(AkismetTests):
                 httpx.TimeoutException, "Timed out."
             ),
         )
-        with self.subTest(method="verify_key"):
-            with self.assertRaises(akismet.RequestError):
-                client.verify_key(self.config.key, self.config.url)
-        for method in ("comment_check", "submit_ham", "submit_spam"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    getattr(client, method)(**self.common_kwargs)
-        for method in ("key_sites", "usage_limit"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    getattr(client, method)()
+        self._assert_all_methods_raise(client, akismet.RequestError)
 
     def test_error_other_httpx(self):
         """
@@ -408,39 +657,19 @@ class SyncAkismetErrorTests(AkismetTests):
             config=self.config,
             http_client=self.exception_sync_client(httpx.RequestError),
         )
-        with self.subTest(method="verify_key"):
-            with self.assertRaises(akismet.RequestError):
-                client.verify_key(self.config.key, self.config.url)
-        for method in ("comment_check", "submit_ham", "submit_spam"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    getattr(client, method)(**self.common_kwargs)
-        for method in ("key_sites", "usage_limit"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    getattr(client, method)()
+        self._assert_all_methods_raise(client, akismet.RequestError)
 
     def test_error_other(self):
         """
-        RequestError is raised when any other (non-``httpx``) exception occurs during
-        the request.
+        Any other (non-``httpx``) exception raised during the request propagates
+        unchanged, rather than being reported as a RequestError.
 
         """
         client = akismet.SyncClient(
             config=self.config,
             http_client=self.exception_sync_client(TypeError),
         )
-        with self.subTest(method="verify_key"):
-            with self.assertRaises(akismet.RequestError):
-                client.verify_key(self.config.key, self.config.url)
-        for method in ("comment_check", "submit_ham", "submit_spam"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    getattr(client, method)(**self.common_kwargs)
-        for method in ("key_sites", "usage_limit"):
-            with self.subTest(method=method):
-                with self.assertRaises(akismet.RequestError):
-                    getattr(client, method)()
+        self._assert_all_methods_raise(client, TypeError)
 
     def test_unknown_argument(self):
         """
@@ -453,7 +682,9 @@ class SyncAkismetErrorTests(AkismetTests):
         )
         for method in ("comment_check", "submit_ham", "submit_spam"):
             with self.subTest(method=method):
-                with self.assertRaises(akismet.UnknownArgumentError):
+                with self.assertRaisesRegex(
+                    akismet.UnknownArgumentError, ": bad_argument"
+                ):
                     getattr(client, method)(bad_argument=1, **self.common_kwargs)
 
     def test_protocol_error_comment_check(self):
@@ -469,6 +700,19 @@ class SyncAkismetErrorTests(AkismetTests):
         with self.assertRaises(akismet.ProtocolError):
             client.comment_check(**self.common_kwargs)
 
+    def test_protocol_error_comment_check_many(self):
+        """
+        ProtocolError is raised when ``comment_check_many()`` receives an unexpected
+        response.
+
+        """
+        client = akismet.SyncClient(
+            config=self.config,
+            http_client=self.custom_response_sync_client(response_text="bad"),
+        )
+        with self.assertRaises(akismet.ProtocolError):
+            client.comment_check_many([self.common_kwargs, self.common_kwargs])
+
     def test_protocol_error_submit_ham_spam(self):
         """
         ProtocolError is raised when ``submit_ham()`` or ``submit_spam()`` receive an
@@ -489,19 +733,9 @@ class SyncAkismetErrorTests(AkismetTests):
         ProtocolError is raised when ``verify_key()`` receives an unexpected response.
 
         """
-
-        def _handler(  # pylint: disable=unused-argument
-            request: httpx.Request,
-        ) -> httpx.Response:
-            """
-            Mock transport handler which returns a controlled response.
-
-            """
-            return httpx.Response(status_code=HTTPStatus.OK, content="bad")
-
         client = akismet.SyncClient(
             config=self.config,
-            http_client=httpx.Client(transport=httpx.MockTransport(_handler)),
+            http_client=httpx.Client(transport=self.fixed_response_transport("bad")),
         )
         with self.assertRaises(akismet.ProtocolError):
             client.verify_key(self.config.key, self.config.url)